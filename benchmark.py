@@ -0,0 +1,535 @@
+# benchmark.py
+
+import time
+import os
+import sys
+import subprocess
+import tempfile
+import contextlib
+import io
+import tracemalloc
+import matplotlib.pyplot as plt
+import imageio
+import numpy as np
+import pandas as pd
+from initialization import initialize_grid, initialize_cells
+from simulation import select_step_function, run_simulation, run_single_simulation
+from jit_kernel import JIT_AVAILABLE
+from cell_store import CellStore
+from tracking import WoundTracker
+from constants import wound_x_min, wound_x_max, EMPTY, ALIVE
+from results_store import ResultsStore
+from results_loader import load_results
+from checkpoint import checkpoint_filename
+from utils import update_grid, apply_grid_deltas, calculate_permeability, calculate_permeability_batch, cmap, render_frame, visualize_grid, open_video_writer
+from ensemble import Ensemble
+from gillespie import GillespieEngine
+from tiled import run_tiled_simulation
+from trajectory import Trajectory, trajectory_filename
+from lattice import neighbor_offsets, lattice_of, site_index
+
+# Function to set up the initial monolayer of a rows x cols lattice (cells in the first and last 30 columns):
+# returns the grid and the CellStore of its cells
+def initial_monolayer(rows=100, cols=100):
+    grid = initialize_grid(rows, cols)
+    cell_positions, cell_states = initialize_cells(cols, rows)
+    grid, _ = update_grid(grid, cell_positions, cell_states, rows, cols)
+    return grid, CellStore.from_arrays(cell_positions, cell_states, grid.shape)
+
+# Function to run an engine ('python', 'frontier', 'jit' or 'gillespie') for num_steps steps from the initial monolayer,
+# timing every step; returns the per-step times, (division count, migration count) and number of grid changes, and the
+# step at which the wound closed (None if it did not). before_step(grid, cells) runs untimed before every step of the
+# step engines, e.g. to sample the lattice
+def run_engine_steps(engine, num_steps, rows=100, cols=100, senescence_probability=0.1, seed=0, before_step=None):
+    grid, cells = initial_monolayer(rows, cols)
+    wound_tracker = WoundTracker(grid, wound_x_min, wound_x_max)
+    generator = np.random.default_rng(seed)
+    if engine == 'gillespie':
+        event_engine = GillespieEngine(grid, senescence_probability, generator, wound_tracker)
+    else:
+        step_function = select_step_function(engine)
+        new_cells = CellStore(grid.shape, capacity=len(cells.x))
+
+    step_times, counts, change_counts = [], [], []
+    wound_closed_step = None
+    for step in range(num_steps):
+        if engine == 'gillespie':
+            start = time.perf_counter()
+            event_engine.advance(step + 1)
+            change_counts.append(len(event_engine.grid_deltas))
+            event_engine.flush()
+            step_times.append(time.perf_counter() - start)
+            counts.append((event_engine.division_count, event_engine.migration_count))
+            event_engine.division_count = event_engine.migration_count = 0
+        else:
+            if before_step is not None:
+                before_step(grid, cells)
+            start = time.perf_counter()
+            grid_deltas = []
+            counts.append(step_function(grid, cells, new_cells, senescence_probability, wound_tracker, grid_deltas, generator))
+            cells, new_cells = new_cells, cells
+            cells.compact()
+            new_cells.clear()
+            apply_grid_deltas(grid, grid_deltas)
+            step_times.append(time.perf_counter() - start)
+            change_counts.append(len(grid_deltas))
+        if wound_tracker.is_closed() and wound_closed_step is None:
+            wound_closed_step = step + 1
+
+    return step_times, counts, change_counts, wound_closed_step
+
+# Function to time the cell update step for growing numbers of cells
+# (the lattice is grown along x, so every extra row adds 60 cells to the initial monolayer)
+def benchmark_step_scaling(grid_rows=(50, 100, 200, 400, 800), num_steps=5, senescence_probability=0.1, seed=0):
+    results = []
+
+    for rows in grid_rows:
+        cell_counts = []
+        step_times, _, _, _ = run_engine_steps('python', num_steps, rows=rows, senescence_probability=senescence_probability, seed=seed,
+                                               before_step=lambda grid, cells: cell_counts.append(len(cells)))
+
+        avg_cells = np.mean(cell_counts)
+        avg_step_time = np.mean(step_times)
+        results.append((rows, avg_cells, avg_step_time, avg_step_time / avg_cells * 1e6))
+
+    return results
+
+# Function to compare a lattice of int64 states with one of STATE_DTYPE: memory of the padded lattice and time of the
+# full-grid permeability scan (the metrics and rendering pass over the whole lattice) for growing grid sizes
+def benchmark_lattice_dtypes(sizes=(100, 1000, 4000), repeats=3):
+    results = []
+    for size in sizes:
+        compact = initialize_grid(size, size)
+        compact[:, :size * 3 // 10] = ALIVE
+        compact[:, size - size * 3 // 10:] = ALIVE
+        wide = compact.astype(np.int64)
+        timings = []
+        for grid in (wide, compact):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                calculate_permeability(grid)
+            timings.append((time.perf_counter() - start) / repeats)
+        results.append((size, (size + 2) ** 2 * wide.itemsize, lattice_of(compact).nbytes, timings[0], timings[1]))
+
+    return results
+
+# Function to time the Python step against the active-frontier engine over the phases of a run (both make the same
+# updates from the same seed); returns the mean step time and the share of interior cells of each phase
+def benchmark_frontier_engine(phases=((0, 20), (20, 60), (60, 120)), senescence_probability=0.1, seed=0):
+    interior_shares = []
+
+    # Function to record the share of interior cells: ALIVE cells without an EMPTY Moore neighbor
+    def sample_interior(grid, cells):
+        lattice = lattice_of(grid)
+        sites = site_index(cells.x[:cells.size].astype(np.int64), cells.y[:cells.size].astype(np.int64), grid.shape)
+        has_empty_neighbor = np.any([lattice[sites + offset] == EMPTY for offset in neighbor_offsets(grid.shape).moore], axis=0)
+        interior_shares.append(np.mean((cells.state[:cells.size] == ALIVE) & ~has_empty_neighbor))
+
+    python_times, _, _, _ = run_engine_steps('python', phases[-1][1], senescence_probability=senescence_probability, seed=seed, before_step=sample_interior)
+    frontier_times, _, _, _ = run_engine_steps('frontier', phases[-1][1], senescence_probability=senescence_probability, seed=seed)
+
+    results = []
+    for first, last in phases:
+        python_time, frontier_time = np.mean(python_times[first:last]), np.mean(frontier_times[first:last])
+        results.append((f'{first}-{last}', np.mean(interior_shares[first:last]), python_time, frontier_time, python_time / frontier_time))
+
+    return results
+
+# Function to time the Python step against the event-driven engine over the phases of a run; returns the mean time per step
+# and the mean number of events per step of the event-driven engine in each phase (the engines do not make the same updates)
+def benchmark_gillespie_engine(phases=((0, 20), (20, 60), (60, 120), (120, 300)), senescence_probability=0.1, seed=0):
+    python_times, _, _, _ = run_engine_steps('python', phases[-1][1], senescence_probability=senescence_probability, seed=seed)
+    event_times, _, event_counts, _ = run_engine_steps('gillespie', phases[-1][1], senescence_probability=senescence_probability, seed=seed)
+
+    results = []
+    for first, last in phases:
+        python_time, event_time = np.mean(python_times[first:last]), np.mean(event_times[first:last])
+        results.append((f'{first}-{last}', np.mean(event_counts[first:last]), python_time, event_time, python_time / event_time))
+
+    return results
+
+# Function to compare the event-driven engine with the step model over several seeds: the step at which every wound
+# position was updated and the divisions and migrations of the first num_steps steps, per seed and engine
+def benchmark_gillespie_agreement(seeds=range(8), num_steps=60, senescence_probability=0.1):
+    results = []
+    for seed in seeds:
+        _, python_counts, _, python_closed = run_engine_steps('python', num_steps, senescence_probability=senescence_probability, seed=seed)
+        _, event_counts, _, event_closed = run_engine_steps('gillespie', num_steps, senescence_probability=senescence_probability, seed=seed)
+        (python_divisions, python_migrations), (event_divisions, event_migrations) = np.sum(python_counts, axis=0), np.sum(event_counts, axis=0)
+        results.append((seed, python_closed, event_closed, int(python_divisions), int(event_divisions), int(python_migrations), int(event_migrations)))
+
+    return results
+
+# Function to compare the memory held by the per-step cell containers: Python lists of tuples
+# (plus their np.array conversion) against the preallocated CellStore arrays
+def benchmark_cell_storage(grid_rows=(100, 400, 1600)):
+    results = []
+
+    for rows in grid_rows:
+        cell_positions, cell_states = initialize_cells(100, rows)
+
+        tracemalloc.start()
+        new_positions = [(int(x), int(y)) for x, y in cell_positions]
+        new_states = [int(state) for state in cell_states]
+        converted = (np.array(new_positions), np.array(new_states))
+        list_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        cells = CellStore.from_arrays(cell_positions, cell_states, (rows, 100))
+        store_bytes = sum(values.nbytes for values in (cells.x, cells.y, cells.state, cells.indices, cells.order))
+        results.append((rows, len(cells), list_bytes, store_bytes))
+
+    return results
+
+# Function to compare the throughput (replicate-steps per second) of the scalar engine with the ensemble engine
+# for growing numbers of replicates on the default 100x100 lattice
+def benchmark_ensemble_throughput(replicates=(1, 4, 16, 64), num_steps=10, senescence_probability=0.1, seed=0):
+    step_times, _, _, _ = run_engine_steps('python', num_steps, senescence_probability=senescence_probability, seed=seed)
+    scalar_rate = num_steps / sum(step_times)
+
+    results = []
+    for count in replicates:
+        ensemble = Ensemble(senescence_probability, count, seed=seed)
+        start = time.perf_counter()
+        for step in range(num_steps):
+            ensemble.step()
+        ensemble_rate = count * num_steps / (time.perf_counter() - start)
+        results.append((count, scalar_rate, ensemble_rate, ensemble_rate / scalar_rate))
+
+    return results
+
+# Function to time the Python step against the compiled kernel on square lattices
+# (the kernel is compiled on a small lattice first, so compilation is not part of the timings)
+def benchmark_jit_speedup(grid_sizes=(100, 1000), num_steps=3, senescence_probability=0.1, seed=0):
+    if not JIT_AVAILABLE:
+        print("numba is not installed; the jit engine falls back to the Python step")
+        return []
+
+    run_engine_steps('jit', 1)  # Compiles the kernel
+
+    results = []
+    for size in grid_sizes:
+        cell_counts = []
+        python_times, _, _, _ = run_engine_steps('python', num_steps, rows=size, cols=size, senescence_probability=senescence_probability, seed=seed,
+                                                 before_step=lambda grid, cells: cell_counts.append(len(cells)))
+        jit_times, _, _, _ = run_engine_steps('jit', num_steps, rows=size, cols=size, senescence_probability=senescence_probability, seed=seed)
+        python_time, jit_time = np.mean(python_times), np.mean(jit_times)
+        results.append((size, cell_counts[-1], python_time, jit_time, python_time / jit_time))
+
+    return results
+
+# Function to compare the time to save one frame with plt.imshow + plt.savefig against render_frame + imageio.imwrite
+def benchmark_frame_rendering(num_frames=20, upscale=4, seed=0):
+    rng = np.random.default_rng(seed)
+    grids = rng.integers(-1, 4, size=(num_frames, 100, 100))
+    results = []
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        for i, grid in enumerate(grids):
+            plt.imshow(grid, cmap=cmap, vmin=-1, vmax=3)
+            plt.axis('off')
+            plt.savefig(os.path.join(output_dir, f'matplotlib_{i:03d}.png'), bbox_inches='tight', pad_inches=0, dpi=100)
+            plt.clf()
+        results.append(('matplotlib savefig', (time.perf_counter() - start) / num_frames))
+
+        start = time.perf_counter()
+        for i, grid in enumerate(grids):
+            imageio.imwrite(os.path.join(output_dir, f'render_{i:03d}.png'), render_frame(grid, upscale))
+        results.append((f'render_frame x{upscale} + imwrite', (time.perf_counter() - start) / num_frames))
+
+        start = time.perf_counter()
+        for grid in grids:
+            render_frame(grid, upscale)
+        results.append((f'render_frame x{upscale} (in memory)', (time.perf_counter() - start) / num_frames))
+
+    return results
+
+# Function to compare writing a GIF by saving PNG frames and reading them back (the create_simulation_video route)
+# with streaming the rendered frames straight into an open writer
+def benchmark_video_streaming(num_frames=100, seed=0):
+    # Frames of a closing wound: the initial monolayer with the wound rows filling up and a few scattered state changes
+    rng = np.random.default_rng(seed)
+    grid = initialize_grid(100, 100)
+    cell_positions, cell_states = initialize_cells(100, 100)
+    grid, _ = update_grid(grid, cell_positions, cell_states, 100, 100)
+    grids = np.repeat(grid[None], num_frames, axis=0)
+    for step in range(num_frames):
+        grids[step, :, 30:30 + 40 * step // num_frames] = 1
+        grids[step][rng.random((100, 100)) < 0.02] = rng.integers(0, 4)
+    results = []
+    working_dir = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        os.chdir(output_dir)
+        try:
+            start = time.perf_counter()
+            for step, grid in enumerate(grids):
+                visualize_grid(grid, step, 0, 0.1, save_images=True)
+            frame_files = sorted(os.path.join('simulation_images', f) for f in os.listdir('simulation_images'))
+            with imageio.get_writer('round_trip.gif', duration=200, loop=0) as writer:
+                for frame_file in frame_files:
+                    writer.append_data(imageio.v2.imread(frame_file))
+            results.append(('PNG frames + read back', time.perf_counter() - start))
+
+            start = time.perf_counter()
+            writer = open_video_writer(0, 0.1, output_dir='.', video_format='gif')
+            for step, grid in enumerate(grids):
+                visualize_grid(grid, step, 0, 0.1, save_images=False, writer=writer)
+            writer.close()
+            results.append(('Streamed into the writer', time.perf_counter() - start))
+        finally:
+            os.chdir(working_dir)
+
+    return results
+
+# Function to compare the wall time of runs that save every frame and their Excel file in the loop
+# with runs that hand those writes to the background OutputWriter
+def benchmark_background_io(num_steps=30, runs=2, senescence_probability=0.1, engine='python'):
+    results = []
+    working_dir = os.getcwd()
+
+    for background_io in (False, True):
+        with tempfile.TemporaryDirectory() as output_dir:
+            os.chdir(output_dir)
+            try:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):  # run_simulation prints every step
+                    run_simulation(senescence_probability, num_steps, runs=runs, engine=engine, background_io=background_io)
+                results.append(('Background writer' if background_io else 'Writes in the loop', time.perf_counter() - start))
+            finally:
+                os.chdir(working_dir)
+
+    return results
+
+# Function to time domain-decomposed runs of a large lattice on growing numbers of worker processes; returns the
+# seconds per step (process start-up included) and the speedup over one worker
+def benchmark_tiled_scaling(size=1000, workers=(1, 2, 4), num_steps=5, senescence_probability=0.1, engine='python', seed=0):
+    results = []
+    for count in workers:
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # run_tiled_simulation prints every step
+                run_tiled_simulation(senescence_probability, num_steps, shape=(size, size), workers=count, seed=seed, engine=engine, results_dir=output_dir)
+            results.append((count, (time.perf_counter() - start) / num_steps))
+
+    return [(count, step_time, results[0][1] / step_time) for count, step_time in results]
+
+# Function to compare the wall time of a run with and without the trajectory recorder, and the time to recompute
+# a metric (the permeability of every step) by replaying the recorded trajectory instead of re-simulating the run
+def benchmark_trajectory_recording(num_steps=60, senescence_probability=0.1, seed=0):
+    results = []
+    working_dir = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        os.chdir(output_dir)
+        try:
+            for trajectory in (False, True):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):  # run_single_simulation prints every step
+                    run_single_simulation(senescence_probability, num_steps, 0, seed=seed, save_images=False, results_dir=output_dir, trajectory=trajectory)
+                results.append(('Run with trajectory' if trajectory else 'Run without trajectory', time.perf_counter() - start))
+
+            start = time.perf_counter()
+            calculate_permeability_batch(Trajectory(trajectory_filename(senescence_probability, 0))[1:])
+            results.append(('Permeability replayed from trajectory', time.perf_counter() - start))
+        finally:
+            os.chdir(working_dir)
+
+    return results
+
+# Function to compare the wall time of a run that renders and records every step with a sparse output cadence
+def benchmark_output_cadence(num_steps=100, cadences=((1, 1, 0), (10, 10, 5), (25, 5, 5)), senescence_probability=0.1, engine='python'):
+    results = []
+    working_dir = os.getcwd()
+
+    for frame_every, metrics_every, closure_window in cadences:
+        with tempfile.TemporaryDirectory() as output_dir:
+            os.chdir(output_dir)
+            try:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):  # run_simulation prints every step
+                    run_simulation(senescence_probability, num_steps, engine=engine, frame_every=frame_every, metrics_every=metrics_every, closure_window=closure_window)
+                results.append((frame_every, metrics_every, closure_window, time.perf_counter() - start))
+            finally:
+                os.chdir(working_dir)
+
+    return results
+
+# Function to compare writing and reading back the results of many runs as Excel workbooks and in the results store
+def benchmark_results_formats(runs=50, num_steps=120, file_formats=('parquet', 'feather', 'csv'), seed=0):
+    rng = np.random.default_rng(seed)
+    df_results = pd.DataFrame({'Senescence Probability': 0.1, 'Step': np.arange(1, num_steps + 1), 'Division Count': rng.integers(0, 60, num_steps),
+                               'Migration Count': rng.integers(0, 2500, num_steps), 'Average Permeability': rng.random(num_steps),
+                               'Wound Area': rng.integers(0, 1600, num_steps), 'Senescent_Count': rng.integers(0, 300, num_steps), 'Wound Closure Step': 52})
+    results = []
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        for run in range(runs):
+            df_results.to_excel(os.path.join(output_dir, f'division_migration_senescence_1.0e-01_run_{run + 1}.xlsx'), index=False)
+        write_time = time.perf_counter() - start
+        start = time.perf_counter()
+        pd.concat([pd.read_excel(os.path.join(output_dir, f'division_migration_senescence_1.0e-01_run_{run + 1}.xlsx')) for run in range(runs)])
+        results.append(('excel', write_time, time.perf_counter() - start))
+
+        for file_format in file_formats:
+            try:
+                results_store = ResultsStore(os.path.join(output_dir, file_format), file_format)
+                start = time.perf_counter()
+                for run in range(runs):
+                    results_store.write(df_results, 0.1, run, seed + run)
+                write_time = time.perf_counter() - start
+                start = time.perf_counter()
+                results_store.read()
+                results.append((file_format, write_time, time.perf_counter() - start))
+            except ImportError:
+                print(f"Skipping {file_format}: pyarrow is not installed")
+
+    return results
+
+# Function to time loading a directory of result workbooks with an empty cache and again with a warm cache
+def benchmark_results_loader(runs=100, num_steps=120, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    with tempfile.TemporaryDirectory() as input_dir:
+        for run in range(runs):
+            df_results = pd.DataFrame({'Senescence Probability': 0.1, 'Step': np.arange(1, num_steps + 1), 'Division Count': rng.integers(0, 60, num_steps),
+                                       'Migration Count': rng.integers(0, 2500, num_steps), 'Wound Closure Step': 52})
+            df_results.to_excel(os.path.join(input_dir, f'division_migration_senescence_1.0e-01_run_{run + 1}.xlsx'), index=False)
+
+        for cache in ('Empty cache', 'Warm cache'):
+            start = time.perf_counter()
+            load_results(input_dir)
+            results.append((cache, time.perf_counter() - start))
+
+    return results
+
+# Function to time a fresh interpreter importing the simulation modules (the cold start of every sweep worker)
+# and list the heavy libraries that the import pulls in
+def benchmark_cold_start(modules=('simulation', 'sweep'), repeats=5):
+    heavy = ('matplotlib', 'pandas', 'imageio', 'openpyxl', 'sklearn', 'numba', 'pyarrow')
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+
+    for module in modules:
+        code = f"import sys; import {module}; print(','.join(name for name in {heavy!r} if name in sys.modules))"
+        times = []
+        for repeat in range(repeats):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', code], cwd=package_dir, capture_output=True, text=True, check=True)
+            times.append(time.perf_counter() - start)
+        results.append((module, float(np.median(times)), output.stdout.strip().splitlines()[-1] if output.stdout.strip() else ''))
+
+    return results
+
+# Function to compare the wall time of a run with and without checkpoints, and report the size of one checkpoint
+def benchmark_checkpoint_overhead(num_steps=100, checkpoint_every=10, senescence_probability=0.1, engine='python'):
+    results = []
+    working_dir = os.getcwd()
+
+    for every in (None, checkpoint_every):
+        with tempfile.TemporaryDirectory() as output_dir:
+            os.chdir(output_dir)
+            try:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run_simulation(senescence_probability, num_steps, engine=engine, save_images=False, checkpoint_every=every)
+                elapsed = time.perf_counter() - start
+                checkpoint_size = os.path.getsize(checkpoint_filename(senescence_probability, 0)) if every else 0
+                results.append((every, elapsed, checkpoint_size))
+            finally:
+                os.chdir(working_dir)
+
+    return results
+
+if __name__ == "__main__":
+    print(f"{'Import':>12} {'Cold start (s)':>15}  Heavy libraries loaded")
+    for module, elapsed, loaded in benchmark_cold_start():
+        print(f"{module:>12} {elapsed:>15.3f}  {loaded or '-'}")
+
+    print()
+    print(f"{'Grid':>10} {'Cells':>10} {'Step time (s)':>15} {'Per cell (us)':>15}")
+    for rows, cells, step_time, per_cell in benchmark_step_scaling():
+        print(f"{f'{rows}x100':>10} {cells:>10.0f} {step_time:>15.4f} {per_cell:>15.2f}")
+
+    print()
+    print(f"{'Grid':>10} {'int64 (MB)':>12} {'int8 (MB)':>10} {'int64 scan (s)':>15} {'int8 scan (s)':>14}")
+    for size, wide_bytes, compact_bytes, wide_time, compact_time in benchmark_lattice_dtypes():
+        print(f"{f'{size}x{size}':>10} {wide_bytes / 1e6:>12.2f} {compact_bytes / 1e6:>10.2f} {wide_time:>15.4f} {compact_time:>14.4f}")
+
+    print()
+    print(f"{'Grid':>10} {'Cells':>10} {'Lists (MB)':>12} {'CellStore (MB)':>15}")
+    for rows, cells, list_bytes, store_bytes in benchmark_cell_storage():
+        print(f"{f'{rows}x100':>10} {cells:>10} {list_bytes / 1e6:>12.2f} {store_bytes / 1e6:>15.2f}")
+
+    print()
+    print(f"{'Replicates':>10} {'Scalar (steps/s)':>18} {'Ensemble (steps/s)':>20} {'Speedup':>10}")
+    for count, scalar_rate, ensemble_rate, speedup in benchmark_ensemble_throughput():
+        print(f"{count:>10} {scalar_rate:>18.2f} {ensemble_rate:>20.2f} {speedup:>10.2f}")
+
+    print()
+    print(f"{'Renderer':>32} {'Per frame (ms)':>15}")
+    for renderer, frame_time in benchmark_frame_rendering():
+        print(f"{renderer:>32} {frame_time * 1e3:>15.2f}")
+
+    print()
+    print(f"{'GIF of 100 frames':>32} {'Time (s)':>15}")
+    for route, elapsed in benchmark_video_streaming():
+        print(f"{route:>32} {elapsed:>15.3f}")
+
+    print()
+    print(f"{'2 runs of 30 steps':>32} {'Time (s)':>15}")
+    for route, elapsed in benchmark_background_io():
+        print(f"{route:>32} {elapsed:>15.3f}")
+
+    print()
+    print(f"{'60 steps':>38} {'Time (s)':>10}")
+    for route, elapsed in benchmark_trajectory_recording():
+        print(f"{route:>38} {elapsed:>10.3f}")
+
+    print()
+    print(f"{'Frames every':>13} {'Metrics every':>14} {'Window':>7} {'Time (s)':>10}")
+    for frame_every, metrics_every, closure_window, elapsed in benchmark_output_cadence(engine='jit' if JIT_AVAILABLE else 'python'):
+        print(f"{frame_every:>13} {metrics_every:>14} {closure_window:>7} {elapsed:>10.3f}")
+
+    print()
+    print(f"{'50 runs':>10} {'Write (s)':>10} {'Read (s)':>10}")
+    for file_format, write_time, read_time in benchmark_results_formats():
+        print(f"{file_format:>10} {write_time:>10.3f} {read_time:>10.3f}")
+
+    print()
+    print(f"{'100 workbooks':>32} {'Time (s)':>15}")
+    for cache, elapsed in benchmark_results_loader():
+        print(f"{cache:>32} {elapsed:>15.3f}")
+
+    print()
+    print(f"{'Checkpoint every':>17} {'Time (s)':>10} {'Size (kB)':>10}")
+    for every, elapsed, checkpoint_size in benchmark_checkpoint_overhead(engine='jit' if JIT_AVAILABLE else 'python'):
+        print(f"{every or '-':>17} {elapsed:>10.3f} {checkpoint_size / 1e3:>10.1f}")
+
+    print()
+    print(f"{'Steps':>10} {'Interior':>10} {'Python (ms)':>12} {'Frontier (ms)':>14} {'Speedup':>10}")
+    for phase, interior_share, python_time, frontier_time, speedup in benchmark_frontier_engine():
+        print(f"{phase:>10} {interior_share:>10.0%} {python_time * 1e3:>12.2f} {frontier_time * 1e3:>14.2f} {speedup:>10.2f}")
+
+    print()
+    print(f"{'Steps':>10} {'Changes':>10} {'Python (ms)':>12} {'Events (ms)':>12} {'Speedup':>10}")
+    for phase, change_count, python_time, event_time, speedup in benchmark_gillespie_engine():
+        print(f"{phase:>10} {change_count:>10.0f} {python_time * 1e3:>12.2f} {event_time * 1e3:>12.2f} {speedup:>10.1f}")
+
+    print()
+    print(f"{'Seed':>6} {'Closed (steps)':>15} {'Closed (events)':>16} {'Divisions':>16} {'Migrations':>18}")
+    for seed, python_closed, event_closed, python_divisions, event_divisions, python_migrations, event_migrations in benchmark_gillespie_agreement():
+        print(f"{seed:>6} {python_closed or '-':>15} {event_closed or '-':>16} {f'{python_divisions} / {event_divisions}':>16} {f'{python_migrations} / {event_migrations}':>18}")
+
+    print()
+    print(f"{'Workers':>10} {'1000x1000 step (s)':>20} {'Speedup':>10}")
+    for count, step_time, speedup in benchmark_tiled_scaling(engine='jit' if JIT_AVAILABLE else 'python'):
+        print(f"{count:>10} {step_time:>20.3f} {speedup:>10.2f}")
+
+    print()
+    print(f"{'Grid':>10} {'Cells':>10} {'Python (s)':>12} {'JIT (s)':>10} {'Speedup':>10}")
+    for size, cells, python_time, jit_time, speedup in benchmark_jit_speedup():
+        print(f"{f'{size}x{size}':>10} {cells:>10} {python_time:>12.4f} {jit_time:>10.4f} {speedup:>10.1f}")
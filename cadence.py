@@ -0,0 +1,50 @@
+# cadence.py
+
+from collections import deque
+
+# Output cadence policy of a run: frames are rendered every frame_every steps and metrics (permeability, wound area,
+# senescent count) recorded every metrics_every steps, plus every step within closure_window steps before and after the
+# step at which the wound closes. The defaults (1, 1, 0) render and record every step.
+# Since the closure step is only known once it happens, the last closure_window steps are held back as snapshots
+# (see hold and release) until they are either outside the window or known to be inside it.
+class OutputCadence:
+    def __init__(self, frame_every=1, metrics_every=1, closure_window=0):
+        if frame_every < 1 or metrics_every < 1 or closure_window < 0:
+            raise ValueError(f"Expected frame_every >= 1, metrics_every >= 1 and closure_window >= 0, got {frame_every}, {metrics_every}, {closure_window}")
+        self.frame_every = frame_every
+        self.metrics_every = metrics_every
+        self.closure_window = closure_window
+        self.closed_step = None
+        self.held = deque()  # (step, snapshot) of the most recent steps before the closure
+
+    # Function to record the step at which the wound closed
+    def close_wound(self, step):
+        self.closed_step = step
+
+    # Function to check whether a step lies within closure_window steps of the closure step
+    def in_closure_window(self, step):
+        return self.closed_step is not None and abs(step - self.closed_step) <= self.closure_window
+
+    def frame_due(self, step):
+        return step % self.frame_every == 0 or self.in_closure_window(step)
+
+    # The last step of a run always records its metrics
+    def metrics_due(self, step, last_step):
+        return step % self.metrics_every == 0 or step == last_step or self.in_closure_window(step)
+
+    # Function to check whether snapshots must be held back (a window is requested and the wound has not closed yet)
+    def holding(self):
+        return self.closure_window > 0 and self.closed_step is None
+
+    # Function to hold back the snapshot of a step; returns the (step, snapshot) that no longer fits in the window, if any
+    def hold(self, step, snapshot):
+        self.held.append((step, snapshot))
+        if len(self.held) > self.closure_window:
+            return self.held.popleft()
+        return None
+
+    # Function to hand back every held (step, snapshot) in step order and forget them
+    def release(self):
+        released = list(self.held)
+        self.held.clear()
+        return released
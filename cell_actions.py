@@ -1,147 +1,168 @@
 # cell_actions.py
 
-import random
 import time
+import itertools
 from constants import EMPTY, ALIVE, DEAD, DIVIDING, SENESCENT
-
-# Function to check room for division (without periodic boundary and correct boundary checks)
-def check_room_in_grid(x, y, grid):
-    neighbors = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-    for dx, dy in neighbors:
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]:
-            if grid[nx, ny] == EMPTY:
-                return True
+from lattice import MOORE_NEIGHBORS, UPPER_NEIGHBORS, LOWER_NEIGHBORS
+
+# Columns of the uniform numbers drawn for every cell at the start of a step (see draw_step_randoms): each random
+# decision a cell can make in one step reads its own column, so a cell never needs more than one row
+DIVISION_DRAW, DEATH_DRAW, MIGRATION_DRAW, NEIGHBOR_DRAW, SENESCENCE_DRAW = range(5)
+DRAWS_PER_CELL = 5
+
+# The actions random_action tries for an ALIVE cell, and the 24 orders in which it can try them
+# (a uniformly random row of the table is a uniformly random order)
+DIVISION, DEATH, MIGRATION, STAY_ALIVE = range(4)
+ACTION_ORDERS = tuple(itertools.permutations((DIVISION, DEATH, MIGRATION, STAY_ALIVE)))
+
+# Function to draw the random numbers of one step in blocks from the run's numpy Generator: one row of DRAWS_PER_CELL
+# uniforms per visited cell and one random order of the four actions of random_action per visited cell
+# (as a row index of ACTION_ORDERS)
+def draw_step_randoms(generator, count):
+    draws = generator.random((count, DRAWS_PER_CELL))
+    action_orders = generator.integers(len(ACTION_ORDERS), size=count)
+    return draws, action_orders
+
+# Function to pick one of the options uniformly with the uniform number u in [0, 1)
+def choose(options, u):
+    return options[int(u * len(options))]
+
+# The functions below probe neighbors by flat index in the padded lattice (see lattice.py): site is the flat index
+# of the cell, lattice the flat padded grid and offsets the grid's NeighborOffsets; the WALL border is never EMPTY
+# and never unclaimed, so no probe needs a bounds check
+
+# Function to check room for division (an EMPTY Moore neighbor)
+def check_room_in_grid(site, lattice, offsets):
+    for offset in offsets.moore:
+        if lattice[site + offset] == EMPTY:
+            return True
     return False
 
-# Function to check if room is available in the list of new positions
-def check_room_in_new_positions(x, y, new_positions, grid):
-    neighbors = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-    for dx, dy in neighbors:
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]:
-            if (nx, ny) not in new_positions:
-                return True
+# Function to check if room is available among the positions claimed so far in this step
+# (claimed is the flat padded mask of the CellStore collecting the cells of the next step)
+def check_room_in_new_positions(site, claimed, offsets):
+    for offset in offsets.moore:
+        if not claimed[site + offset]:
+            return True
     return False
 
-# Function to move cells to an available empty neighboring spot
-def move_cells(x, y, new_positions, grid):
+# Function to add a cell to the next step and claim its position
+def add_cell(x, y, state, new_cells, grid, grid_deltas):
+    new_cells.append(x, y, state)
+    if grid[x, y] != state:  # Record the state change; it is applied to the grid at the end of the step (apply_grid_deltas)
+        grid_deltas.append((x, y, grid[x, y], state))
+
+# Function to write a state into the grid during the step and record the change as (site, old state, new state)
+def write_site(x, y, state, grid, grid_deltas):
+    grid_deltas.append((x, y, grid[x, y], state))
+    grid[x, y] = state
+
+# Function to move cells to an available empty neighboring spot, chosen uniformly with the uniform number u
+# (the same as taking the first empty spot of a shuffled neighbor list)
+# Only called once room among the new positions is known
+def move_cells(x, y, site, lattice, offsets, u):
     # # Non Directional Movement; during homeostasis
     # neighbors = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
     # random.shuffle(neighbors)
     # for dx, dy in neighbors:
     #     nx, ny = x + dx, y + dy
     #     if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]:
-    #         if grid[nx, ny] == EMPTY and check_room_in_new_positions(x, y, new_positions, grid):
+    #         if grid[nx, ny] == EMPTY and check_room_in_new_positions(x, y, occupied, grid):
     #             return nx, ny
     # return x, y # Since we use move_cells function when we know there is a open spot, code will not reach return x, y
 
     # Directional movement; during wound healing process
-    neighbors = [(-1, 1), (0, 1), (1, 1)] if y <= 49 else [(-1, -1), (0, -1), (1, -1)]
-    random.shuffle(neighbors)
-    for dx, dy in neighbors:
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]:
-            if grid[nx, ny] == EMPTY and check_room_in_new_positions(x, y, new_positions, grid):
-                # print(f"Moving cell from ({x}, {y}) to ({nx}, {ny})")
-                return nx, ny
+    neighbors, neighbor_offsets = (UPPER_NEIGHBORS, offsets.upper) if y <= offsets.split else (LOWER_NEIGHBORS, offsets.lower)
+    open_neighbors = [(x + dx, y + dy) for (dx, dy), offset in zip(neighbors, neighbor_offsets) if lattice[site + offset] == EMPTY]
+    if open_neighbors:
+        # print(f"Moving cell from ({x}, {y}) to ({nx}, {ny})")
+        return choose(open_neighbors, u)
     # print(f"No valid move found for cell at ({x}, {y})")
     return x, y  # Return the original position if no move is possible
 
-def move_senescent_cells(x, y, new_positions, grid):
+def move_senescent_cells(x, y, site, lattice, offsets, u):
     # Non Directional Movement; during homeostasis
-    neighbors = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-    random.shuffle(neighbors)
-    for dx, dy in neighbors:
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]:
-            if grid[nx, ny] == EMPTY and check_room_in_new_positions(x, y, new_positions, grid):
-                return nx, ny
+    open_neighbors = [(x + dx, y + dy) for (dx, dy), offset in zip(MOORE_NEIGHBORS, offsets.moore) if lattice[site + offset] == EMPTY]
+    if open_neighbors:
+        return choose(open_neighbors, u)
     return x, y # Since we use move_cells function when we know there is a open spot, code will not reach return x, y
 
+# The check functions below take the cell's flat index (site) in the padded lattice and its row of uniform numbers
+# (draws) from draw_step_randoms
 # Define a function for cell division
-def check_division(x, y, grid, new_positions, new_states, division_probability, wound_positions):
-    if random.random() < division_probability and check_room_in_grid(x, y, grid) and check_room_in_new_positions(x, y, new_positions, grid):
-        new_states.append(DIVIDING)  # Enter dividing state
-        new_positions.append((x, y))  # Keep the original cell's position
-        if 30 <= x <= 69:  # If the cell moves into the wound region, mark the wound position as updated
-            wound_positions.add((x, y))
+def check_division(x, y, site, grid, lattice, offsets, new_cells, grid_deltas, division_probability, wound_tracker, draws):
+    if draws[DIVISION_DRAW] < division_probability and check_room_in_grid(site, lattice, offsets) and check_room_in_new_positions(site, new_cells.claimed_sites, offsets):
+        add_cell(x, y, DIVIDING, new_cells, grid, grid_deltas)  # Enter dividing state, keeping the original cell's position
+        wound_tracker.visit(x, y)  # Mark the position as updated if it lies in the wound region
         return True  # Division occurred
     return False  # Division didn't happen
 
 # Define a function for cell death
-def check_death(x, y, new_positions, new_states, death_probability, wound_positions):
-    if random.random() < death_probability:  # Chance to die
-        new_states.append(DEAD)
-        new_positions.append((x, y))  # Keep the dead cell in the grid for this cycle
-        if 30 <= x <= 69:  # If the cell moves into the wound region, mark the wound position as updated
-            wound_positions.add((x, y))
+def check_death(x, y, grid, new_cells, grid_deltas, death_probability, wound_tracker, draws):
+    if draws[DEATH_DRAW] < death_probability:  # Chance to die
+        add_cell(x, y, DEAD, new_cells, grid, grid_deltas)  # Keep the dead cell in the grid for this cycle
+        wound_tracker.visit(x, y)  # Mark the position as updated if it lies in the wound region
         return True  # Death occurred
     return False  # Death didn't happen
 
 # Define a function for cell migration (modifies migration_count)
-def check_migration(x, y, grid, new_positions, new_states, migration_count, migration_probability, wound_positions):
-    if random.random() < migration_probability and check_room_in_grid(x, y, grid) and check_room_in_new_positions(x, y, new_positions, grid):
+def check_migration(x, y, site, grid, lattice, offsets, new_cells, grid_deltas, migration_count, migration_probability, wound_tracker, draws):
+    if draws[MIGRATION_DRAW] < migration_probability and check_room_in_grid(site, lattice, offsets) and check_room_in_new_positions(site, new_cells.claimed_sites, offsets):
         migration_count += 1  # Increment migration count
-        new_x, new_y = move_cells(x, y, new_positions, grid)  # Move cell to a new position
-        new_states.append(ALIVE)
-        new_positions.append((new_x, new_y))
+        new_x, new_y = move_cells(x, y, site, lattice, offsets, draws[NEIGHBOR_DRAW])  # Move cell to a new position
+        add_cell(new_x, new_y, ALIVE, new_cells, grid, grid_deltas)
         # Update the grid promptly in order to reflect the current grid status for next cells' division and migration in a single update step
-        grid[x, y] = EMPTY
-        grid[new_x, new_y] = ALIVE
+        write_site(x, y, EMPTY, grid, grid_deltas)
+        write_site(new_x, new_y, ALIVE, grid, grid_deltas)
 
-        if 30 <= new_x <= 69:  # If the cell moves into the wound region, mark the wound position as updated
-            wound_positions.add((new_x, new_y))
+        wound_tracker.visit(new_x, new_y)  # Mark the position as updated if it lies in the wound region
 
         return True, migration_count  # Migration occurred
     return False, migration_count  # Migration didn't happen
 
-def check_senescence_migration(x, y, grid, new_positions, new_states, migration_count, senescence_migration_probability, wound_positions):
-    if random.random() < senescence_migration_probability and check_room_in_grid(x, y, grid) and check_room_in_new_positions(x, y, new_positions, grid):
+def check_senescence_migration(x, y, site, grid, lattice, offsets, new_cells, grid_deltas, migration_count, senescence_migration_probability, wound_tracker, draws):
+    if draws[MIGRATION_DRAW] < senescence_migration_probability and check_room_in_grid(site, lattice, offsets) and check_room_in_new_positions(site, new_cells.claimed_sites, offsets):
         migration_count += 1  # Increment migration count
-        new_x, new_y = move_senescent_cells(x, y, new_positions, grid)  # Move cell to a new position
-        new_states.append(SENESCENT)
-        new_positions.append((new_x, new_y))
+        new_x, new_y = move_senescent_cells(x, y, site, lattice, offsets, draws[NEIGHBOR_DRAW])  # Move cell to a new position
+        add_cell(new_x, new_y, SENESCENT, new_cells, grid, grid_deltas)
         # Update the grid promptly in order to reflect the current grid status for next cells' division and migration in a single update step
-        grid[x, y] = EMPTY
-        grid[new_x, new_y] = SENESCENT
+        write_site(x, y, EMPTY, grid, grid_deltas)
+        write_site(new_x, new_y, SENESCENT, grid, grid_deltas)
 
-        if 30 <= new_x <= 69:  # If the cell moves into the wound region, mark the wound position as updated
-            wound_positions.add((new_x, new_y))
+        wound_tracker.visit(new_x, new_y)  # Mark the position as updated if it lies in the wound region
 
         return True, migration_count  # Migration occurred
     return False, migration_count  # Migration didn't happen
 
 # Define a function for keeping a cell alive
-def check_alive(x, y, new_positions, new_states, wound_positions):
-    new_states.append(ALIVE)
-    new_positions.append((x, y))  # Keep the original position
-    if 30 <= x <= 69:  # If the cell moves into the wound region, mark the wound position as updated
-        wound_positions.add((x, y))
+def check_alive(x, y, grid, new_cells, grid_deltas, wound_tracker):
+    add_cell(x, y, ALIVE, new_cells, grid, grid_deltas)  # Keep the original position
+    wound_tracker.visit(x, y)  # Mark the position as updated if it lies in the wound region
     return True  # Cell stays alive
 
 # Function to choose a random action for each cell
-def random_action(x, y, grid, new_positions, new_states, migration_count, division_probability, death_probability, migration_probability, wound_positions):
+# draws is the cell's row of uniform numbers and action_order the row of ACTION_ORDERS in which the actions are tried
+def random_action(x, y, site, grid, lattice, offsets, new_cells, grid_deltas, migration_count, division_probability, death_probability, migration_probability, wound_tracker, draws, action_order):
     # If the cell is senescent, it remains in its state and is not processed further
-    if grid[x, y] == SENESCENT:
-        new_states.append(SENESCENT)
-        new_positions.append((x, y))
-        if 30 <= x <= 69:  # Mark the wound position as updated if applicable
-            wound_positions.add((x, y))
+    if lattice[site] == SENESCENT:
+        add_cell(x, y, SENESCENT, new_cells, grid, grid_deltas)
+        wound_tracker.visit(x, y)  # Mark the position as updated if it lies in the wound region
         return migration_count
     
-    actions = [
-        lambda: (check_division(x, y, grid, new_positions, new_states, division_probability, wound_positions), migration_count),
-        lambda: (check_death(x, y, new_positions, new_states, death_probability, wound_positions), migration_count,),
-        lambda: check_migration(x, y, grid, new_positions, new_states, migration_count, migration_probability, wound_positions),
-        lambda: (check_alive(x, y, new_positions, new_states, wound_positions), migration_count)
-    ]
-
-    random.shuffle(actions)
-
-    for action in actions:
-        success, migration_count = action()
-        if success:
+    # Try the actions in the drawn order until one succeeds (staying alive always does)
+    for action in ACTION_ORDERS[action_order]:
+        if action == DIVISION:
+            if check_division(x, y, site, grid, lattice, offsets, new_cells, grid_deltas, division_probability, wound_tracker, draws):
+                break
+        elif action == DEATH:
+            if check_death(x, y, grid, new_cells, grid_deltas, death_probability, wound_tracker, draws):
+                break
+        elif action == MIGRATION:
+            success, migration_count = check_migration(x, y, site, grid, lattice, offsets, new_cells, grid_deltas, migration_count, migration_probability, wound_tracker, draws)
+            if success:
+                break
+        else:
+            check_alive(x, y, grid, new_cells, grid_deltas, wound_tracker)
             break
 
     return migration_count  # Return the updated migration_count
@@ -0,0 +1,121 @@
+# cell_store.py
+
+import numpy as np
+from constants import EMPTY, STATE_DTYPE, COORDINATE_DTYPE
+
+# Structure-of-arrays store for the cells of one step: preallocated x, y and state arrays that grow by doubling,
+# plus a boolean occupancy mask with the grid's shape marking every position appended during the step
+# The mask is the interior of a padded mask (claimed) whose border is always claimed, so the engines can probe
+# neighbors by flat index in the padded lattice without bounds checks (see lattice.py)
+# claimed can be given as an existing padded mask (e.g. in shared memory, see tiled.py); its border must be True.
+# claimed=False makes a store that claims nothing and has no mask, for cells that are only visited (see tiled.py)
+class CellStore:
+    def __init__(self, grid_shape, capacity=1024, claimed=None):
+        self.x = np.empty(capacity, dtype=COORDINATE_DTYPE)
+        self.y = np.empty(capacity, dtype=COORDINATE_DTYPE)
+        self.state = np.empty(capacity, dtype=STATE_DTYPE)
+        self.indices = np.arange(capacity, dtype=np.int32)
+        self.order = np.empty(capacity, dtype=np.int32)  # Reusable buffer for the shuffled visiting order
+        self.size = 0
+        if claimed is None:
+            claimed = np.ones((grid_shape[0] + 2, grid_shape[1] + 2), dtype=bool)
+            claimed[1:-1, 1:-1] = False
+        if claimed is False:
+            self.claimed = self.occupied = self.claimed_sites = None
+        else:
+            self.claimed = claimed
+            self.occupied = self.claimed[1:-1, 1:-1]
+            self.claimed_sites = self.claimed.ravel()  # Flat view, indexed like the flat padded lattice
+
+    # Function to build a store from (N, 2) positions and N states, e.g. the output of initialize_cells
+    @classmethod
+    def from_arrays(cls, positions, states, grid_shape):
+        cells = cls(grid_shape, capacity=max(2 * len(states), 1024))
+        cells.size = len(states)
+        cells.x[:cells.size] = positions[:, 0]
+        cells.y[:cells.size] = positions[:, 1]
+        cells.state[:cells.size] = states
+        cells.occupied[cells.x[:cells.size], cells.y[:cells.size]] = True
+        return cells
+
+    def __len__(self):
+        return self.size
+
+    # Function to grow the arrays when they are full (amortised O(1) appends)
+    def grow(self):
+        capacity = 2 * len(self.x)
+        for name in ('x', 'y', 'state', 'order'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        self.indices = np.arange(capacity, dtype=np.int32)
+
+    # Function to add a cell and claim its position for this step
+    def append(self, x, y, state):
+        if self.size == len(self.x):
+            self.grow()
+        self.x[self.size] = x
+        self.y[self.size] = y
+        self.state[self.size] = state
+        self.size += 1
+        if self.occupied is not None:
+            self.occupied[x, y] = True
+
+    # Function to add many cells at once (positions are expected to be distinct)
+    def extend(self, xs, ys, states):
+        while self.size + len(states) > len(self.x):
+            self.grow()
+        end = self.size + len(states)
+        self.x[self.size:end] = xs
+        self.y[self.size:end] = ys
+        self.state[self.size:end] = states
+        self.size = end
+        if self.occupied is not None:
+            self.occupied[xs, ys] = True
+
+    # Function to reorder the stored cells, e.g. with an argsort of a key per cell
+    def permute(self, order):
+        for values in (self.x, self.y, self.state):
+            values[:self.size] = values[:self.size][order]
+
+    # Function to empty the store for the next step without reallocating (only the claimed sites are reset)
+    def clear(self):
+        if self.occupied is not None:
+            self.occupied[self.x[:self.size], self.y[:self.size]] = False
+        self.size = 0
+
+    # Function to drop EMPTY entries (cells that died and were removed from the grid) in place
+    def compact(self):
+        keep = self.state[:self.size] != EMPTY
+        count = int(np.count_nonzero(keep))
+        if count < self.size:
+            if self.occupied is not None:
+                self.occupied[self.x[:self.size][~keep], self.y[:self.size][~keep]] = False
+            for values in (self.x, self.y, self.state):
+                values[:count] = values[:self.size][keep]
+            self.size = count
+            if self.occupied is not None:
+                # Positions shared by a removed entry and a kept one must stay claimed
+                self.occupied[self.x[:count], self.y[:count]] = True
+
+    # Function to draw a random visiting order of the stored cells from the numpy Generator, in the reused order buffer
+    def shuffled_order(self, generator):
+        order = self.order[:self.size]
+        order[:] = self.indices[:self.size]
+        generator.shuffle(order)
+        return order
+
+    # Function to iterate over (x, y, state) of the stored cells in a random order (see shuffled_order)
+    def shuffled(self, generator):
+        order = self.shuffled_order(generator)
+        x, y, state = self.x, self.y, self.state
+        for i in order:
+            yield int(x[i]), int(y[i]), int(state[i])
+
+    # Views of the stored cells
+    def positions(self):
+        return np.column_stack((self.x[:self.size], self.y[:self.size]))
+
+    def states(self):
+        return self.state[:self.size]
@@ -0,0 +1,86 @@
+# checkpoint.py
+
+import os
+import json
+import numpy as np
+from cell_store import CellStore
+from tracking import PermeabilityTracker, WoundTracker
+from lattice import padded_grid
+from constants import STATE_DTYPE
+
+# Function to write a checkpoint as a compressed NumPy archive (written to a temporary file first,
+# so a run killed while saving leaves the previous checkpoint intact)
+def save_checkpoint(path, state):
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as checkpoint_file:
+        np.savez_compressed(checkpoint_file, **state)
+    os.replace(temporary_path, path)
+
+# Function to read a checkpoint back as a dict of arrays
+def load_checkpoint(path):
+    with np.load(path) as checkpoint:
+        return {name: checkpoint[name] for name in checkpoint.files}
+
+# Function to collect the full state of a run after `step` completed steps as a dict of arrays
+# (the state of the run's numpy Generator, the grid, the current cells, both trackers, the grid changes the trackers have not seen yet,
+# the recorded result rows and the cadence's closure step and held snapshots)
+def run_state(step, senescence_probability, run, seed, generator, grid, cells, permeability_tracker, wound_tracker, pending_deltas, results, wound_closed_step, cadence):
+    held = cadence.held
+    return {
+        'step': np.array(step),
+        'senescence_probability': np.array(senescence_probability),
+        'run': np.array(run),
+        'seed': np.array(str(seed)),  # Seeds may exceed 64 bits
+        'generator_state': np.array(json.dumps(generator.bit_generator.state)),  # 128-bit integers, kept as JSON text
+        'grid': grid,
+        'cell_x': cells.x[:cells.size],
+        'cell_y': cells.y[:cells.size],
+        'cell_state': cells.state[:cells.size],
+        'permeability_states': permeability_tracker.states,
+        'permeability_sums': np.array([permeability_tracker.open_edge_sum, permeability_tracker.cell_count]),
+        'wound_visited': wound_tracker.visited,
+        'wound_counts': np.array([wound_tracker.visited_count, wound_tracker.empty_dead_count]),
+        'pending_deltas': np.array(pending_deltas, dtype=np.int16).reshape(-1, 4),  # Coordinates and states fit in int16
+        # Result rows: [p, step, division count, migration count, permeability, wound area, senescent count]
+        'results_int': np.array([[row[1], row[2], row[3], row[5], row[6]] for row in results], dtype=np.int64).reshape(-1, 5),
+        'results_permeability': np.array([row[4] for row in results], dtype=np.float64),
+        'wound_closed_step': np.array(-1 if wound_closed_step is None else wound_closed_step),
+        'cadence_closed_step': np.array(-1 if cadence.closed_step is None else cadence.closed_step),
+        'held_steps': np.array([held_step for held_step, _ in held], dtype=np.int64),
+        'held_grids': np.array([snapshot[0] for _, snapshot in held], dtype=grid.dtype).reshape(-1, *grid.shape),
+        'held_counts': np.array([[snapshot[1], snapshot[2]] for _, snapshot in held], dtype=np.int64).reshape(-1, 2),
+        'held_recorded': np.array([snapshot[3] for _, snapshot in held], dtype=bool),
+    }
+
+# Function to restore a run from the arrays of run_state: sets the state of the generator, refills the cadence's held
+# snapshots and returns (step, grid, cells, permeability_tracker, wound_tracker, pending_deltas, results, wound_closed_step)
+def restore_run_state(state, wound_bounds, cadence, generator, debug=False):
+    generator.bit_generator.state = json.loads(str(state['generator_state']))
+
+    grid = padded_grid(state['grid'])
+    cells = CellStore.from_arrays(np.column_stack((state['cell_x'], state['cell_y'])), state['cell_state'], grid.shape)
+
+    permeability_tracker = PermeabilityTracker(grid, debug=debug)
+    permeability_tracker.states = state['permeability_states'].astype(STATE_DTYPE)  # Checkpoints of older versions hold int64 states
+    permeability_tracker.open_edge_sum, permeability_tracker.cell_count = (int(value) for value in state['permeability_sums'])
+
+    wound_tracker = WoundTracker(grid, wound_bounds[0], wound_bounds[1], debug=debug)
+    wound_tracker.visited = state['wound_visited'].copy()
+    wound_tracker.visited_count, wound_tracker.empty_dead_count = (int(value) for value in state['wound_counts'])
+
+    pending_deltas = [tuple(delta) for delta in state['pending_deltas'].tolist()]
+    senescence_probability = float(state['senescence_probability'])
+    results = [[senescence_probability, step, division_count, migration_count, permeability, wound_area, senescent_count]
+               for (step, division_count, migration_count, wound_area, senescent_count), permeability
+               in zip(state['results_int'].tolist(), state['results_permeability'].tolist())]
+    wound_closed_step = int(state['wound_closed_step'])
+
+    cadence.closed_step = None if int(state['cadence_closed_step']) < 0 else int(state['cadence_closed_step'])
+    for held_step, held_grid, (division_count, migration_count), metrics_recorded in zip(state['held_steps'].tolist(), state['held_grids'], state['held_counts'].tolist(), state['held_recorded'].tolist()):
+        cadence.held.append((held_step, (held_grid.copy(), division_count, migration_count, metrics_recorded)))
+
+    return int(state['step']), grid, cells, permeability_tracker, wound_tracker, pending_deltas, results, None if wound_closed_step < 0 else wound_closed_step
+
+# Function to return the default checkpoint file of a run (next to its Excel file)
+def checkpoint_filename(senescence_probability, run):
+    return f'checkpoint_{senescence_probability:.1e}_run_{run + 1}.npz'
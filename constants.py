@@ -1,9 +1,17 @@
+import numpy as np
+
 # Constants for cell states
 ALIVE = 1
 DEAD = 0
 DIVIDING = 2
 SENESCENT = 3
 EMPTY = -1  # New constant for empty spots
+WALL = -2  # State of the border around the lattice (see lattice.py); never a cell, never EMPTY
+
+# Array types of the lattice and the cell arrays: every state (WALL to SENESCENT) fits in int8 and every coordinate of
+# a lattice up to 32,767 sites across fits in int16 (arithmetic on coordinates that may exceed that is done in int64)
+STATE_DTYPE = np.int8
+COORDINATE_DTYPE = np.int16
 
 # Parameters for probabilities
 # division_probability = 0.0278  # Probability of a cell dividing if space is available
@@ -30,3 +38,7 @@ constant_senescence_probability =[0.1]
 # Size of the grid
 grid_size_x = 100
 grid_size_y = 100
+
+# Rows of the wound region tracked for closure and the Wound Area metric (x = wound_x_min to x = wound_x_max across all y)
+wound_x_min = 30
+wound_x_max = 69
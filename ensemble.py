@@ -0,0 +1,218 @@
+# ensemble.py
+
+import time
+import numpy as np
+from constants import *
+from initialization import initialize_grid, initialize_cells
+from utils import update_grid, calculate_permeability_batch
+import cell_actions
+from lattice import neighbor_offsets, lattice_of
+
+# The 24 orders in which random_action tries (division, death, migration, alive), shared with cell_actions
+ACTION_ORDERS = np.array(cell_actions.ACTION_ORDERS)
+DIVISION, DEATH, MIGRATION, STAY_ALIVE, STAY_SENESCENT = 0, 1, 2, 3, 4
+
+# Batched ensemble engine: R replicates are held as one stacked lattice and advanced together.
+# Within a step every replicate visits its own cells in its own random order, one cell at a time (the same
+# sequential update as simulate_step); the k-th cell of all replicates is processed at once with NumPy, so the
+# interpreter overhead is paid once per k instead of once per replicate.
+# Choosing the first suitable neighbor of a shuffled neighbor list is the same as choosing uniformly among the
+# suitable neighbors, which is how neighbor choices are drawn here.
+class Ensemble:
+    def __init__(self, senescence_probability, replicates, seed=None, wound_bounds=(wound_x_min, wound_x_max)):
+        self.senescence_probability = senescence_probability
+        self.replicates = replicates
+        self.rng = np.random.default_rng(seed)
+        self.rows, self.cols = grid_size_x, grid_size_y
+        self.width = self.cols + 2
+        self.plane = (self.rows + 2) * self.width
+
+        # Padded lattice of every replicate, flattened to (replicates * plane,) so sites are plain integer indices
+        grid = initialize_grid(grid_size_x, grid_size_y)
+        cell_positions, cell_states = initialize_cells(grid_size_x, grid_size_x)
+        grid, _ = update_grid(grid, cell_positions, cell_states, grid_size_x, grid_size_y)
+        padded = lattice_of(grid).reshape(self.rows + 2, self.width)
+        self.lattice = np.tile(padded.ravel(), replicates)
+        self.border = np.tile((padded == WALL).ravel(), replicates)  # The border always counts as claimed
+        self.occupied = self.border.copy()
+        self.visited = np.zeros(replicates * self.plane, dtype=bool)
+
+        # Flat-index offsets of the neighborhoods (the same within every replicate's plane)
+        offsets = neighbor_offsets(grid.shape)
+        self.moore_offsets = np.array(offsets.moore)
+        self.upper_offsets = np.array(offsets.upper)
+        self.lower_offsets = np.array(offsets.lower)
+        self.split = offsets.split
+
+        # Cell lists of every replicate (sites within the replicate's plane and states), padded to a common capacity:
+        # the cells of a step hold distinct sites (dead cells are dropped every step), so a list never outgrows the grid
+        # The replicate's plane offset (plane_offsets) is added to a site where it indexes the stacked lattice
+        capacity = self.rows * self.cols
+        self.plane_offsets = np.arange(replicates, dtype=np.int64) * self.plane
+        initial_sites = (cell_positions[:, 0].astype(np.int64) + 1) * self.width + cell_positions[:, 1] + 1
+        self.cell_site = np.zeros((replicates, capacity), dtype=np.int32)
+        self.cell_state = np.zeros((replicates, capacity), dtype=STATE_DTYPE)
+        self.cell_site[:, :len(initial_sites)] = initial_sites
+        self.cell_state[:, :len(initial_sites)] = cell_states
+        self.cell_count = np.full(replicates, len(initial_sites))
+        self.new_site = np.zeros_like(self.cell_site)
+        self.new_state = np.zeros_like(self.cell_state)
+        self.new_count = np.zeros(replicates, dtype=np.int64)
+
+        # Wound region of the padded lattice (rows x = wound_x_min..wound_x_max across all y)
+        self.wound_slice = (slice(None), slice(wound_bounds[0] + 1, wound_bounds[1] + 2), slice(1, -1))
+
+    # Function to add cells to the next step of the given replicates (each replicate at most once per call);
+    # sites are indices into the stacked lattice
+    def append(self, replicate_rows, sites, states):
+        slots = self.new_count[replicate_rows]
+        self.new_site[replicate_rows, slots] = sites - self.plane_offsets[replicate_rows]
+        self.new_state[replicate_rows, slots] = states
+        self.new_count[replicate_rows] += 1
+        self.occupied[sites] = True
+
+    # Function to advance every replicate by one step; returns the division and migration counts per replicate
+    def step(self):
+        replicates = self.replicates
+        lattice, occupied, visited = self.lattice, self.occupied, self.visited
+        occupied[:] = self.border
+        self.new_count[:] = 0
+        division_counts = np.zeros(replicates, dtype=np.int64)
+        migration_counts = np.zeros(replicates, dtype=np.int64)
+
+        # Random visiting order of every replicate (padding entries are sorted last) and the step's uniform draws
+        max_count = int(self.cell_count.max())
+        keys = self.rng.random((replicates, max_count))
+        keys[np.arange(max_count)[None, :] >= self.cell_count[:, None]] = 2.0
+        order = np.argsort(keys, axis=1)
+        sites = np.take_along_axis(self.cell_site[:, :max_count], order, axis=1).T + self.plane_offsets
+        states = np.take_along_axis(self.cell_state[:, :max_count], order, axis=1).T.copy()
+        draws = self.rng.random((max_count, replicates, 3))
+        action_orders = ACTION_ORDERS[self.rng.integers(len(ACTION_ORDERS), size=(max_count, replicates))]
+
+        # Replicates sorted by cell count, so the replicates still having a k-th cell form a prefix of length active_counts[k]
+        by_count = np.argsort(-self.cell_count, kind='stable')
+        active_counts = np.searchsorted(-self.cell_count[by_count], -np.arange(max_count), side='left')
+        # Moore neighbors followed by the directional neighbors (upper or lower) of a site
+        all_offsets = np.stack((np.concatenate((self.moore_offsets, self.lower_offsets)), np.concatenate((self.moore_offsets, self.upper_offsets))))
+
+        for k in range(max_count):
+            rows = by_count[:active_counts[k]]
+            s = sites[k, rows]
+            state = states[k, rows]
+            u = draws[k, rows]
+            count = len(rows)
+            index = np.arange(count)
+
+            is_alive = state == ALIVE
+            is_dividing = state == DIVIDING
+            is_dead = state == DEAD
+            is_senescent = state == SENESCENT
+
+            # Neighborhood of every cell: 8 Moore neighbors, then the 3 directional migration targets towards the wound
+            upper = (s % self.plane) % self.width - 1 <= self.split
+            neighbors = s[:, None] + all_offsets[upper.astype(np.intp)]
+            empty = lattice[neighbors] == EMPTY
+            free = ~occupied[neighbors[:, :8]]
+            room = empty[:, :8].any(axis=1) & free.any(axis=1)
+
+            # ALIVE cells try (division, death, migration, alive) in a random order until one succeeds
+            succeeds = np.empty((count, 4), dtype=bool)
+            succeeds[:, DIVISION] = (u[:, 0] < division_probability) & room
+            succeeds[:, DEATH] = u[:, 1] < death_probability
+            succeeds[:, MIGRATION] = (u[:, 2] < migration_probability) & room
+            succeeds[:, STAY_ALIVE] = True
+            orders = action_orders[k, rows]
+            action = orders[index, np.argmax(np.take_along_axis(succeeds, orders, axis=1), axis=1)]
+            action[lattice[s] == SENESCENT] = STAY_SENESCENT
+            migrates = is_alive & (action == MIGRATION)
+
+            # Candidate targets: directional EMPTY neighbors for migration, EMPTY and unclaimed neighbors for a daughter,
+            # EMPTY neighbors for senescent migration; one is drawn uniformly (first match of a shuffled neighbor list)
+            candidates = np.zeros((count, 11), dtype=bool)
+            candidates[:, 8:] = empty[:, 8:] & migrates[:, None]
+            candidates[:, :8] = np.where(is_dividing[:, None], empty[:, :8] & free, empty[:, :8] & is_senescent[:, None])
+            has_target = candidates.any(axis=1)
+            choice = np.argmax(np.where(candidates, self.rng.random((count, 11)), -1.0), axis=1)
+            target = np.where(has_target, neighbors[index, choice], s)
+
+            divides = is_dividing & has_target & (u[:, 0] >= death_probability) & (u[:, 1] >= self.senescence_probability)
+            senescent_moves = is_senescent & (u[:, 2] < senescence_migration_probability) & room
+            moves = migrates | divides | senescent_moves
+
+            # New state at the cell's own site (or at its target when it moves)
+            new_state = np.where(is_alive, np.choose(action, (DIVIDING, DEAD, ALIVE, ALIVE, SENESCENT)), SENESCENT).astype(STATE_DTYPE)
+            new_state[is_dividing] = ALIVE
+            new_state[is_dividing & has_target & (u[:, 0] < death_probability)] = DEAD
+            new_state[is_dividing & has_target & (u[:, 0] >= death_probability) & (u[:, 1] < self.senescence_probability)] = SENESCENT
+            new_site = np.where(migrates | senescent_moves | divides, target, s)
+
+            # Grid writes: vacated sites become EMPTY before the target is filled (a migrating cell may stay in place)
+            lattice[s[migrates | senescent_moves | is_dead]] = EMPTY
+            lattice[target[moves]] = np.where(senescent_moves, SENESCENT, ALIVE)[moves]
+            occupied[s[is_dead]] = True
+
+            # New cells of the next step: every cell but the dead ones, plus the mother of a division at its own site
+            keeps = ~is_dead
+            self.append(rows[keeps], new_site[keeps], new_state[keeps])
+            self.append(rows[divides], s[divides], ALIVE)
+            visited[new_site[is_alive | is_senescent | divides]] = True
+
+            division_counts[rows[divides]] += 1
+            migration_counts[rows[migrates | senescent_moves]] += 1
+
+        # Apply the state changes of the step (DIVIDING, DEAD, ...) and make the new cells current
+        valid = np.arange(self.new_site.shape[1])[None, :] < self.new_count[:, None]
+        lattice[self.new_site[valid] + np.nonzero(valid)[0] * self.plane] = self.new_state[valid]
+        self.cell_site, self.new_site = self.new_site, self.cell_site
+        self.cell_state, self.new_state = self.new_state, self.cell_state
+        self.cell_count, self.new_count = self.new_count, self.cell_count
+
+        return division_counts, migration_counts
+
+    # Lattices of all replicates without the border, shape (replicates, grid_size_x, grid_size_y)
+    def grids(self):
+        return self.lattice.reshape(self.replicates, self.rows + 2, self.width)[:, 1:-1, 1:-1]
+
+    # Function to check, per replicate, whether every position of the wound region has been updated by a cell
+    def wound_closed(self):
+        return self.visited.reshape(self.replicates, self.rows + 2, self.width)[self.wound_slice].all(axis=(1, 2))
+
+    # Function to count the EMPTY or DEAD sites of the wound region per replicate
+    def wound_area(self):
+        wound = self.lattice.reshape(self.replicates, self.rows + 2, self.width)[self.wound_slice]
+        return np.count_nonzero((wound == EMPTY) | (wound == DEAD), axis=(1, 2))
+
+    # Function to count the SENESCENT cells per replicate
+    def senescent_count(self):
+        valid = np.arange(self.cell_state.shape[1])[None, :] < self.cell_count[:, None]
+        return np.count_nonzero((self.cell_state == SENESCENT) & valid, axis=1)
+
+# Function to simulate many replicates of one senescence probability together
+# Returns a dict of (replicates, num_steps) arrays keyed by the output column names, plus the per-replicate
+# 'Wound Closure Step' (-1 if the wound did not close) and the throughput in replicate-steps per second
+def run_ensemble(senescence_probability, num_steps, replicates, seed=None, wound_bounds=(wound_x_min, wound_x_max)):
+    ensemble = Ensemble(senescence_probability, replicates, seed=seed, wound_bounds=wound_bounds)
+    results = {column: np.zeros((replicates, num_steps)) for column in ('Division Count', 'Migration Count', 'Average Permeability', 'Wound Area', 'Senescent_Count')}
+    wound_closed_step = np.full(replicates, -1)
+
+    start = time.perf_counter()
+    for step in range(num_steps):
+        division_counts, migration_counts = ensemble.step()
+
+        # Record the first step at which each replicate's wound area is fully updated
+        newly_closed = ensemble.wound_closed() & (wound_closed_step < 0)
+        wound_closed_step[newly_closed] = step + 1
+
+        results['Division Count'][:, step] = division_counts
+        results['Migration Count'][:, step] = migration_counts
+        results['Average Permeability'][:, step] = calculate_permeability_batch(ensemble.grids())
+        results['Wound Area'][:, step] = ensemble.wound_area()
+        results['Senescent_Count'][:, step] = ensemble.senescent_count()
+    elapsed = time.perf_counter() - start
+
+    results['Wound Closure Step'] = wound_closed_step
+    results['Replicate-Steps per Second'] = replicates * num_steps / elapsed
+    print(f"Ensemble of {replicates} replicates: {replicates * num_steps / elapsed:.1f} replicate-steps per second")
+
+    return results
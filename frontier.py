@@ -0,0 +1,143 @@
+# frontier.py
+
+import bisect
+import heapq
+import numpy as np
+from constants import EMPTY, ALIVE, DEAD, death_probability
+from cell_actions import draw_step_randoms, ACTION_ORDERS, DEATH, STAY_ALIVE, DEATH_DRAW
+from lattice import neighbor_offsets, lattice_of
+from simulation import update_cell
+
+# For every row of ACTION_ORDERS: whether random_action tries death before staying alive
+DEATH_BEFORE_ALIVE = np.array([order.index(DEATH) < order.index(STAY_ALIVE) for order in ACTION_ORDERS])
+
+# Smallest share of interior cells for which a step settles them in bulk
+MIN_INTERIOR_SHARE = 0.5
+
+# Active-frontier engine: the same update as simulate_step (same random draws, same visiting order, same results),
+# without sending the interior of the monolayer through random_action one cell at a time.
+# An ALIVE cell without an EMPTY Moore neighbor cannot divide or migrate, so it dies if death comes before staying
+# alive in its action order and its death draw succeeds, and stays alive otherwise. Such interior cells are settled
+# together with NumPy; only the frontier (every other cell) is updated one cell at a time, in visiting order.
+# A site only becomes EMPTY when a cell migrates away or a dead cell is cleared; an interior cell next to such a site
+# that comes later in the visiting order is woken and updated one cell at a time as well.
+# The engine keeps the number of EMPTY Moore neighbors of every site of the padded lattice and updates it on each
+# change of a site during the step; it is rebuilt from the grid when a step gets a lattice it has not seen.
+class FrontierEngine:
+    def __init__(self):
+        # The per-site arrays are kept as lists, which are faster than NumPy arrays one element at a time
+        self.padded = None  # Padded lattice the counts below belong to
+        self.empty = None  # Flat mask of the EMPTY sites, as the counts see them
+        self.empty_neighbors = None  # Flat count of the EMPTY Moore neighbors of every site
+        self.interior_index = None  # Flat position of every site's interior cell in this step's list (-1 if none)
+
+    # Function to count the EMPTY Moore neighbors of every site from scratch
+    def rebuild(self, grid):
+        lattice, offsets = lattice_of(grid), neighbor_offsets(grid.shape)
+        self.padded = grid.base
+        empty = lattice == EMPTY
+        empty_neighbors = np.zeros(len(lattice), dtype=np.int64)
+        # Sites from the second to the second-last row of the padded lattice have all their neighbors inside it
+        start, stop = grid.shape[1] + 3, len(lattice) - grid.shape[1] - 3
+        for offset in offsets.moore:
+            empty_neighbors[start:stop] += empty[start + offset:stop + offset]
+        self.empty = empty.tolist()
+        self.empty_neighbors = empty_neighbors.tolist()
+        self.interior_index = [-1] * len(lattice)
+
+    # Function to update the counts around a site whose state may have changed; returns True if the site became EMPTY
+    def refresh(self, lattice, site, offsets):
+        is_empty = lattice[site] == EMPTY
+        if is_empty == self.empty[site]:
+            return False
+        self.empty[site] = is_empty
+        change = 1 if is_empty else -1
+        for offset in offsets.moore:
+            self.empty_neighbors[site + offset] += change
+        return is_empty
+
+    # Function to run one update step; a drop-in replacement for simulate_step
+    def step(self, grid, cells, new_cells, senescence_probability, wound_tracker, grid_deltas, generator):
+        if grid.base is not self.padded:
+            self.rebuild(grid)
+        lattice, offsets, claimed = lattice_of(grid), neighbor_offsets(grid.shape), new_cells.claimed_sites
+        width = grid.shape[1] + 2
+        migration_count = 0
+        division_count = 0
+
+        # Draw the random numbers and the visiting order in the same way as simulate_step
+        draws, action_orders = draw_step_randoms(generator, len(cells))
+        order = cells.shuffled_order(generator)
+        xs, ys, states = cells.x[order].astype(np.int64), cells.y[order].astype(np.int64), cells.state[order]
+        sites = (xs + 1) * width + ys + 1
+
+        x_list, y_list, site_list, state_list = xs.tolist(), ys.tolist(), sites.tolist(), states.tolist()
+        draw_rows, action_order_list = draws.tolist(), action_orders.tolist()
+
+        # Interior cells by their rank in the visiting order
+        empty_neighbors, interior_index = self.empty_neighbors, self.interior_index
+        interior = (states == ALIVE) & (np.array([empty_neighbors[site] for site in site_list], dtype=np.int64) == 0)
+        interior_ranks = np.flatnonzero(interior)
+
+        # With few interior cells the bookkeeping costs more than it saves: update every cell one at a time instead
+        # (with the same draws and order) and count the EMPTY neighbors afresh at the next step
+        if len(interior_ranks) < MIN_INTERIOR_SHARE * len(site_list):
+            for rank in range(len(site_list)):
+                division_count, migration_count = update_cell(x_list[rank], y_list[rank], site_list[rank], state_list[rank], draw_rows[rank], action_order_list[rank],
+                                                              grid, lattice, offsets, new_cells, grid_deltas, senescence_probability, wound_tracker, division_count, migration_count)
+            self.padded = None
+            return division_count, migration_count
+
+        interior_sites = sites[interior_ranks]
+        interior_rank_list, interior_site_list = interior_ranks.tolist(), interior_sites.tolist()
+        for index, site in enumerate(interior_site_list):
+            interior_index[site] = index
+        awake = [False] * len(interior_ranks)
+
+        # Frontier cells in visiting order (the sorted list is a valid heap; woken interior cells are pushed onto it)
+        heap = np.flatnonzero(~interior).tolist()
+        claimed_upto = 0  # Interior cells before this position of the list have claimed their sites
+        entry_ranks = []  # Rank of the cell that added each entry of new_cells
+
+        while heap:
+            rank = heapq.heappop(heap)
+
+            # Interior cells earlier in the visiting order have claimed their sites by now
+            upto = bisect.bisect_left(interior_rank_list, rank)
+            for index in range(claimed_upto, upto):
+                if not awake[index]:
+                    claimed[interior_site_list[index]] = True
+            claimed_upto = upto
+
+            size_before, deltas_before = len(new_cells), len(grid_deltas)
+            division_count, migration_count = update_cell(x_list[rank], y_list[rank], site_list[rank], state_list[rank], draw_rows[rank], action_order_list[rank],
+                                                          grid, lattice, offsets, new_cells, grid_deltas, senescence_probability, wound_tracker, division_count, migration_count)
+            entry_ranks.extend([rank] * (len(new_cells) - size_before))
+
+            # Update the counts around the sites that became or stopped being EMPTY and wake the interior cells next to a vacated site
+            for x, y, old_state, new_state in grid_deltas[deltas_before:]:
+                if old_state != EMPTY and new_state != EMPTY:
+                    continue
+                changed = (x + 1) * width + y + 1
+                if self.refresh(lattice, changed, offsets):
+                    for offset in offsets.moore:
+                        index = interior_index[changed + offset]
+                        if index >= 0 and interior_rank_list[index] > rank and not awake[index]:
+                            awake[index] = True
+                            heapq.heappush(heap, interior_rank_list[index])
+
+        # Settle the interior cells that were never woken
+        asleep = ~np.array(awake, dtype=bool)
+        claimed[interior_sites[claimed_upto:][asleep[claimed_upto:]]] = True
+        ranks = interior_ranks[asleep]
+        dies = DEATH_BEFORE_ALIVE[action_orders[ranks]] & (draws[ranks, DEATH_DRAW] < death_probability)
+        new_cells.extend(xs[ranks], ys[ranks], np.where(dies, DEAD, ALIVE))
+        grid_deltas.extend((x, y, ALIVE, DEAD) for x, y in zip(xs[ranks][dies].tolist(), ys[ranks][dies].tolist()))
+        wound_tracker.visit_all(xs[ranks], ys[ranks])
+        for site in interior_site_list:
+            interior_index[site] = -1
+
+        # Put the new cells in the order simulate_step would have added them
+        new_cells.permute(np.argsort(np.concatenate((np.array(entry_ranks, dtype=np.int64), ranks)), kind='stable'))
+
+        return division_count, migration_count
@@ -0,0 +1,282 @@
+# gillespie.py
+
+import heapq
+import math
+import numpy as np
+from constants import *
+from initialization import initialize_grid, initialize_cells
+from utils import update_grid, apply_grid_deltas, net_grid_deltas, visualize_grid, open_video_writer
+from tracking import PermeabilityTracker, WoundTracker
+from lattice import neighbor_offsets, lattice_of
+from cell_actions import ACTION_ORDERS, DIVISION, DEATH, MIGRATION
+
+# Rate classes of a site: all sites of a class have the same events at the same rates, so the next event is drawn by
+# picking a class in proportion to its total rate and then one of its sites uniformly
+NO_EVENTS, ALIVE_CROWDED, ALIVE_SIDE_ROOM, ALIVE_FORWARD_ROOM, SENESCENT_ROOM = range(5)
+
+# A division completes and a dead cell is cleared this long after the cell became DIVIDING or DEAD (one step, as in simulate_step)
+STATE_DURATION = 1.0
+
+RANDOM_BLOCK = 4096  # Uniform numbers drawn from the generator at a time
+
+# Function to compute the rates of death, division and migration of an ALIVE cell from its chance of each outcome within
+# one step of random_action: an action only counts if it succeeds before staying alive in the cell's random order, so the
+# outcome probabilities are averaged over the 24 rows of ACTION_ORDERS. A cell acts once per step in simulate_step, so the
+# rate of an event is its expected number per step: the outcome probability itself
+def alive_rates(can_divide, can_migrate):
+    success = {DIVISION: division_probability if can_divide else 0.0, DEATH: death_probability, MIGRATION: migration_probability if can_migrate else 0.0}
+    outcomes = {DIVISION: 0.0, DEATH: 0.0, MIGRATION: 0.0}
+    for order in ACTION_ORDERS:
+        remaining = 1.0  # Chance that no earlier action of the order succeeded
+        for action in order:
+            if action not in success:
+                break  # Staying alive always succeeds
+            outcomes[action] += remaining * success[action] / len(ACTION_ORDERS)
+            remaining *= 1.0 - success[action]
+    return tuple(outcomes[action] for action in (DEATH, DIVISION, MIGRATION))
+
+# Event-driven (Gillespie) engine: instead of visiting every cell every step, time jumps from one event to the next.
+# Each cell has events with rates matching the per-step outcome probabilities of simulate_step (see alive_rates):
+#   ALIVE:     death (always), division and migration (with an EMPTY Moore neighbor); a migration without an EMPTY neighbor
+#              towards the wound center leaves the cell in place, as move_cells does, but still pre-empts division and death
+#              and counts in Migration Count
+#   SENESCENT: migration to an EMPTY Moore neighbor
+# A DIVIDING cell completes its division (or dies, or turns SENESCENT, as in simulate_step) and a DEAD cell is cleared
+# STATE_DURATION after it entered that state; these fixed-delay events wait in a priority queue.
+# This is the asynchronous counterpart of the step model, not a replay of it: competing actions race as exponential clocks
+# instead of being tried in a random order, so results agree in distribution only approximately.
+# Nearly all cells of a closed monolayer can only die (at rate ~death_probability), so quiescent phases cost a few events per step.
+class GillespieEngine:
+    def __init__(self, grid, senescence_probability, generator, wound_tracker):
+        self.grid = grid
+        self.senescence_probability = senescence_probability
+        self.generator = generator
+        self.wound_tracker = wound_tracker
+        self.width = grid.shape[1] + 2
+        self.offsets = neighbor_offsets(grid.shape)
+        self.states = lattice_of(grid).tolist()  # Working copy of the padded lattice; the grid catches up in flush
+        # Neighbors towards the wound center of every site (as in move_cells)
+        self.forward = [self.offsets.upper if site % self.width - 1 <= self.offsets.split else self.offsets.lower for site in range(len(self.states))]
+
+        self.time = 0.0
+        self.division_count = 0
+        self.migration_count = 0
+        self.senescent_count = self.states.count(SENESCENT)
+        self.grid_deltas = []  # (x, y, old state, new state) changes not yet applied to the grid
+        self.scheduled = []  # Heap of (time, site) of the DIVIDING and DEAD cells
+        self.uniforms = []
+
+        # (death, division, migration) rates of every class and their sums
+        self.event_rates = ((0.0, 0.0, 0.0), alive_rates(False, False), alive_rates(True, True), alive_rates(True, True), (0.0, 0.0, senescence_migration_probability))
+        self.class_rates = tuple(sum(rates) for rates in self.event_rates)
+
+        # Sites of every class, with each site's class and position in its class list
+        self.members = [[] for _ in self.class_rates]
+        self.site_class = [NO_EVENTS] * len(self.states)
+        self.position = [-1] * len(self.states)
+        for site, state in enumerate(self.states):
+            self.classify(site)
+            if state == DIVIDING or state == DEAD:
+                heapq.heappush(self.scheduled, (STATE_DURATION, site))
+
+        # Every cell present at the start is updated in the first step of simulate_step
+        xs, ys = np.nonzero((grid == ALIVE) | (grid == SENESCENT))
+        wound_tracker.visit_all(xs, ys)
+
+    # Function to return the next uniform number in [0, 1)
+    def uniform(self):
+        if not self.uniforms:
+            self.uniforms = self.generator.random(RANDOM_BLOCK).tolist()
+        return self.uniforms.pop()
+
+    # Function to list the EMPTY sites among the given offsets of a site
+    def empty_neighbors(self, site, offsets):
+        states = self.states
+        return [site + offset for offset in offsets if states[site + offset] == EMPTY]
+
+    # Function to move a site to the rate class its state and neighborhood call for
+    def classify(self, site):
+        states = self.states
+        state = states[site]
+        new_class = NO_EVENTS
+        if state == ALIVE:
+            if any(states[site + offset] == EMPTY for offset in self.forward[site]):
+                new_class = ALIVE_FORWARD_ROOM
+            elif any(states[site + offset] == EMPTY for offset in self.offsets.moore):
+                new_class = ALIVE_SIDE_ROOM
+            else:
+                new_class = ALIVE_CROWDED
+        elif state == SENESCENT and any(states[site + offset] == EMPTY for offset in self.offsets.moore):
+            new_class = SENESCENT_ROOM
+
+        old_class = self.site_class[site]
+        if new_class == old_class:
+            return
+        if old_class != NO_EVENTS:
+            # Swap the last site of the old class into this site's slot
+            members = self.members[old_class]
+            last = members.pop()
+            if last != site:
+                members[self.position[site]] = last
+                self.position[last] = self.position[site]
+        if new_class != NO_EVENTS:
+            self.position[site] = len(self.members[new_class])
+            self.members[new_class].append(site)
+        self.site_class[site] = new_class
+
+    # Function to change the state of a site and update the classes of the site and its Moore neighbors
+    def write(self, site, state):
+        old_state = self.states[site]
+        self.states[site] = state
+        x, y = site // self.width - 1, site % self.width - 1
+        self.grid_deltas.append((x, y, old_state, state))
+        if state == ALIVE or state == SENESCENT:
+            self.wound_tracker.visit(x, y)  # Mark the position as updated if it lies in the wound region
+        self.senescent_count += (state == SENESCENT) - (old_state == SENESCENT)
+
+        self.classify(site)
+        for offset in self.offsets.moore:
+            self.classify(site + offset)
+
+    # Function to put a site into a fixed-duration state (DIVIDING or DEAD)
+    def start(self, site, state):
+        self.write(site, state)
+        heapq.heappush(self.scheduled, (self.time + STATE_DURATION, site))
+
+    # Function to run one stochastic event, drawn with the total rate of all classes
+    def fire(self, total_rate):
+        # Pick the class in proportion to its total rate, then one of its sites uniformly; the rest of the draw picks the event
+        target = self.uniform() * total_rate
+        site_class = None
+        for candidate in range(1, len(self.class_rates)):
+            weight = len(self.members[candidate]) * self.class_rates[candidate]
+            if weight == 0:
+                continue  # No sites: never chosen, not even when rounding carries target past every weight
+            site_class = candidate
+            if target < weight:
+                break
+            target -= weight
+        members, class_rate = self.members[site_class], self.class_rates[site_class]
+        index = min(int(target / class_rate), len(members) - 1)
+        event = min((target / class_rate - index) * class_rate, math.nextafter(class_rate, 0.0))  # Rounding again: stay within the class's events
+        site = members[index]
+
+        death_rate, division_rate, _ = self.event_rates[site_class]
+        if site_class == SENESCENT_ROOM:
+            self.migrate(site, self.empty_neighbors(site, self.offsets.moore), SENESCENT)
+        elif event < death_rate:
+            self.start(site, DEAD)
+        elif event < death_rate + division_rate:
+            self.start(site, DIVIDING)
+        elif site_class == ALIVE_SIDE_ROOM:
+            self.migration_count += 1  # Migration in place: no EMPTY neighbor towards the wound center
+        else:
+            self.migrate(site, self.empty_neighbors(site, self.forward[site]), ALIVE)
+
+    # Function to move a cell to one of the open sites, chosen uniformly
+    def migrate(self, site, open_sites, state):
+        new_site = open_sites[int(self.uniform() * len(open_sites))]
+        self.write(site, EMPTY)
+        self.write(new_site, state)
+        self.migration_count += 1
+
+    # Function to end the DIVIDING or DEAD state of a site (the same outcomes as update_cell)
+    def complete(self, site):
+        if self.states[site] == DEAD:
+            self.write(site, EMPTY)
+            return
+
+        open_sites = self.empty_neighbors(site, self.offsets.moore)
+        if not open_sites:
+            self.write(site, ALIVE)  # No room: the cell changes back to ALIVE
+        elif self.uniform() < death_probability:
+            self.start(site, DEAD)
+        elif self.uniform() < self.senescence_probability:
+            self.write(site, SENESCENT)
+        else:
+            self.write(open_sites[int(self.uniform() * len(open_sites))], ALIVE)
+            self.write(site, ALIVE)
+            self.division_count += 1
+
+    # Function to run every event up to the given time
+    def advance(self, until):
+        while True:
+            total_rate = sum(len(members) * rate for members, rate in zip(self.members, self.class_rates))
+            next_time = self.time - math.log(1.0 - self.uniform()) / total_rate if total_rate > 0 else math.inf
+            if self.scheduled and self.scheduled[0][0] <= min(next_time, until):
+                # A fixed-delay event comes first; the exponential clock is memoryless, so its draw is simply dropped
+                self.time, site = heapq.heappop(self.scheduled)
+                self.complete(site)
+            elif next_time <= until:
+                self.time = next_time
+                self.fire(total_rate)
+            else:
+                self.time = until
+                return
+
+    # Function to apply the changes since the last call to the grid; returns them as net (x, y, old state, new state) deltas
+    def flush(self):
+        apply_grid_deltas(self.grid, self.grid_deltas)
+        grid_deltas = net_grid_deltas(self.grid, self.grid_deltas)
+        self.grid_deltas = []
+        return grid_deltas
+
+# Function to simulate one run with the event-driven engine; the counterpart of run_single_simulation (same arguments,
+# same results columns and files), with the state resampled at every whole step: Division Count and Migration Count
+# count the events within the step and the other columns describe the grid at its end
+# Checkpoints and the closure window of the output cadence are not supported
+def run_gillespie_simulation(senescence_probability, num_steps, run, seed=None, wound_bounds=(wound_x_min, wound_x_max), debug=False, save_images=True, video=None, fps=5, output_writer=None,
+                             frame_every=1, metrics_every=1, results_dir='simulation_results', excel=False, trajectory=False, trajectory_path=None):
+    from simulation import save_run_results
+    from cadence import OutputCadence
+    from trajectory import TrajectoryWriter, trajectory_filename
+
+    cadence = OutputCadence(frame_every, metrics_every)
+    video_writer = open_video_writer(run, senescence_probability, fps=fps, video_format=video) if video else None
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    generator = np.random.default_rng(np.random.SeedSequence(seed))
+
+    grid = initialize_grid(grid_size_x, grid_size_y)
+    cell_positions, cell_states = initialize_cells(grid_size_x, grid_size_x)
+    grid, color_grid = update_grid(grid, cell_positions, cell_states, grid_size_x, grid_size_y)
+    visualize_grid(color_grid, 0, run, senescence_probability, save_images=save_images, writer=video_writer, output_writer=output_writer)
+    permeability_tracker = PermeabilityTracker(grid, debug=debug)
+    wound_tracker = WoundTracker(grid, wound_bounds[0], wound_bounds[1], debug=debug)
+    engine = GillespieEngine(grid, senescence_probability, generator, wound_tracker)
+    trajectory_writer = None
+    if trajectory:
+        trajectory_writer = TrajectoryWriter(trajectory_path or trajectory_filename(senescence_probability, run), num_steps, grid.shape, senescence_probability, run, seed, engine='gillespie')
+        trajectory_writer.write(0, grid)
+
+    results = []
+    wound_closed_step = None
+    for step in range(num_steps):
+        engine.advance(step + 1)
+
+        if wound_tracker.is_closed() and wound_closed_step is None:
+            wound_closed_step = step + 1
+            print(f"All wound positions were updated at step {wound_closed_step}")
+
+        if cadence.metrics_due(step + 1, num_steps) or cadence.frame_due(step + 1) or trajectory_writer is not None:
+            grid_deltas = engine.flush()
+            permeability_tracker.apply_deltas(grid, grid_deltas)
+            wound_tracker.apply_deltas(grid_deltas)
+        if cadence.metrics_due(step + 1, num_steps):
+            results.append([senescence_probability, step + 1, engine.division_count, engine.migration_count, permeability_tracker.permeability(grid), wound_tracker.wound_area(grid), engine.senescent_count])
+        if cadence.frame_due(step + 1):
+            visualize_grid(grid, step + 1, run, senescence_probability, save_images=save_images, writer=video_writer, output_writer=output_writer)
+        if trajectory_writer is not None:
+            trajectory_writer.write(step + 1, grid)
+        engine.division_count = engine.migration_count = 0
+        print(step)
+
+    if video_writer is not None:
+        if output_writer is not None:
+            output_writer.submit(video_writer.close)  # Queued after the run's last frame
+        else:
+            video_writer.close()
+    if trajectory_writer is not None:
+        trajectory_writer.close()
+
+    return save_run_results(results, senescence_probability, run, seed, wound_closed_step, results_dir=results_dir, excel=excel, output_writer=output_writer, engine='gillespie')
@@ -1,10 +1,12 @@
 # initialization.py
 
 import numpy as np
-from constants import EMPTY, ALIVE
+from constants import ALIVE, STATE_DTYPE, COORDINATE_DTYPE
+from lattice import empty_lattice
 
+# The grid is the interior of a padded lattice with a WALL border (see lattice.py)
 def initialize_grid(grid_size_x, grid_size_y):
-    return np.full((grid_size_x, grid_size_y), EMPTY, dtype=int)
+    return empty_lattice((grid_size_x, grid_size_y))
 
 def initialize_cells(grid_size_x, grid_size_y):
     # Left block of cells (first 30 grid points)
@@ -13,7 +15,7 @@ def initialize_cells(grid_size_x, grid_size_y):
     right_block = [(j, i) for i in range(70, grid_size_x) for j in range(grid_size_y)]
 
     # Combine both blocks
-    initial_positions = np.array(left_block + right_block)
-    initial_states = np.array([ALIVE] * len(initial_positions))
+    initial_positions = np.array(left_block + right_block, dtype=COORDINATE_DTYPE)
+    initial_states = np.full(len(initial_positions), ALIVE, dtype=STATE_DTYPE)
 
     return initial_positions, initial_states
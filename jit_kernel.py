@@ -0,0 +1,207 @@
+# jit_kernel.py
+
+import numpy as np
+from constants import EMPTY, ALIVE, DEAD, DIVIDING, SENESCENT
+from constants import division_probability, death_probability, migration_probability, senescence_migration_probability
+from lattice import neighbor_offsets, lattice_of
+
+# numba is optional: without it the kernels below stay plain Python and the 'jit' engine falls back to simulate_step
+try:
+    from numba import njit
+    JIT_AVAILABLE = True
+except ImportError:
+    JIT_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+# Action codes of random_action
+DIVISION, DEATH, MIGRATION, STAY_ALIVE = 0, 1, 2, 3
+
+# Positions of the kernel's running counters
+NEW_SIZE, DELTA_COUNT, VISITED_COUNT = 0, 1, 2
+
+# Function to seed the kernel's random number generator (numba keeps its own generator, separate from random and np.random)
+@njit(cache=True)
+def seed_kernel(seed):
+    np.random.seed(seed)
+
+# Neighbors are probed by flat index in the padded lattice with the offset tables of lattice.py (moore, upper, lower);
+# the grid and occupied arrays are the interior views of the same memory, used for (x, y) writes
+
+# Function to check room for division (same as check_room_in_grid)
+@njit(cache=True)
+def room_in_grid(site, lattice, moore):
+    for k in range(len(moore)):
+        if lattice[site + moore[k]] == EMPTY:
+            return True
+    return False
+
+# Function to check if room is available among the positions claimed so far in this step (same as check_room_in_new_positions)
+@njit(cache=True)
+def room_in_new_positions(site, claimed, moore):
+    for k in range(len(moore)):
+        if not claimed[site + moore[k]]:
+            return True
+    return False
+
+# Function to record a (x, y, old state, new state) grid change
+@njit(cache=True)
+def record_delta(x, y, old_state, new_state, deltas, counters):
+    index = counters[DELTA_COUNT]
+    deltas[index, 0] = x
+    deltas[index, 1] = y
+    deltas[index, 2] = old_state
+    deltas[index, 3] = new_state
+    counters[DELTA_COUNT] = index + 1
+
+# Function to add a cell to the next step and claim its position (same as add_cell)
+@njit(cache=True)
+def add_cell(x, y, state, grid, new_x, new_y, new_state, occupied, deltas, counters):
+    index = counters[NEW_SIZE]
+    new_x[index] = x
+    new_y[index] = y
+    new_state[index] = state
+    counters[NEW_SIZE] = index + 1
+    occupied[x, y] = True
+    if grid[x, y] != state:
+        record_delta(x, y, grid[x, y], state, deltas, counters)
+
+# Function to write a state into the grid during the step and record the change (same as write_site)
+@njit(cache=True)
+def write_site(x, y, state, grid, deltas, counters):
+    record_delta(x, y, grid[x, y], state, deltas, counters)
+    grid[x, y] = state
+
+# Function to mark a position as updated if it lies in the wound region (same as WoundTracker.visit)
+@njit(cache=True)
+def visit(x, y, area, visited, counters):
+    if area[x, y] and not visited[x, y]:
+        visited[x, y] = True
+        counters[VISITED_COUNT] += 1
+
+# Function to find the first EMPTY site among the shuffled neighbors (same as move_cells and move_senescent_cells,
+# which are only called once room among the new positions is known); returns its (x, y)
+@njit(cache=True)
+def move_target(site, offsets, lattice, width):
+    target = site
+    for k in np.random.permutation(len(offsets)):
+        if lattice[site + offsets[k]] == EMPTY:
+            target = site + offsets[k]
+            break
+    return target // width - 1, target % width - 1
+
+# Function to run one update step over all cells with the semantics of simulate_step, on the arrays of the cell stores
+# New cells are written from counters[NEW_SIZE] on, grid changes into deltas; returns the division and migration counts
+@njit(cache=True)
+def step_kernel(grid, lattice, claimed, moore, upper, lower, split, cell_x, cell_y, cell_state, size, new_x, new_y, new_state, occupied, area, visited, deltas, counters,
+                senescence_probability, division_probability, death_probability, migration_probability, senescence_migration_probability):
+    division_count = 0
+    migration_count = 0
+    width = grid.shape[1] + 2
+    open_x = np.empty(8, dtype=np.int64)
+    open_y = np.empty(8, dtype=np.int64)
+
+    for i in np.random.permutation(size):
+        x, y, state = np.int64(cell_x[i]), np.int64(cell_y[i]), cell_state[i]
+        site = (x + 1) * width + y + 1
+
+        if state == ALIVE:
+            # If the cell is senescent, it remains in its state and is not processed further
+            if lattice[site] == SENESCENT:
+                add_cell(x, y, SENESCENT, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                visit(x, y, area, visited, counters)
+                continue
+
+            for action in np.random.permutation(4):
+                if action == DIVISION:
+                    if np.random.random() < division_probability and room_in_grid(site, lattice, moore) and room_in_new_positions(site, claimed, moore):
+                        add_cell(x, y, DIVIDING, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                        visit(x, y, area, visited, counters)
+                        break
+                elif action == DEATH:
+                    if np.random.random() < death_probability:
+                        add_cell(x, y, DEAD, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                        visit(x, y, area, visited, counters)
+                        break
+                elif action == MIGRATION:
+                    if np.random.random() < migration_probability and room_in_grid(site, lattice, moore) and room_in_new_positions(site, claimed, moore):
+                        migration_count += 1
+                        nx, ny = move_target(site, upper if y <= split else lower, lattice, width)
+                        add_cell(nx, ny, ALIVE, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                        write_site(x, y, EMPTY, grid, deltas, counters)
+                        write_site(nx, ny, ALIVE, grid, deltas, counters)
+                        visit(nx, ny, area, visited, counters)
+                        break
+                else:
+                    add_cell(x, y, ALIVE, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                    visit(x, y, area, visited, counters)
+                    break
+
+        elif state == DIVIDING:
+            # Collect the open neighbors in shuffled order
+            open_count = 0
+            for k in np.random.permutation(8):
+                neighbor = site + moore[k]
+                if lattice[neighbor] == EMPTY and not claimed[neighbor]:
+                    open_x[open_count] = neighbor // width - 1
+                    open_y[open_count] = neighbor % width - 1
+                    open_count += 1
+
+            if open_count > 0:
+                choice = np.random.randint(open_count)
+                if np.random.random() < death_probability:
+                    add_cell(x, y, DEAD, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                elif np.random.random() < senescence_probability:
+                    add_cell(x, y, SENESCENT, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                else:
+                    add_cell(open_x[choice], open_y[choice], ALIVE, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                    add_cell(x, y, ALIVE, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                    division_count += 1
+                    write_site(open_x[choice], open_y[choice], ALIVE, grid, deltas, counters)
+                    visit(open_x[choice], open_y[choice], area, visited, counters)
+            else:
+                add_cell(x, y, ALIVE, grid, new_x, new_y, new_state, occupied, deltas, counters)
+
+        elif state == DEAD:
+            add_cell(x, y, EMPTY, grid, new_x, new_y, new_state, occupied, deltas, counters)
+            write_site(x, y, EMPTY, grid, deltas, counters)
+
+        elif state == SENESCENT:
+            if np.random.random() < senescence_migration_probability and room_in_grid(site, lattice, moore) and room_in_new_positions(site, claimed, moore):
+                migration_count += 1
+                nx, ny = move_target(site, moore, lattice, width)
+                add_cell(nx, ny, SENESCENT, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                write_site(x, y, EMPTY, grid, deltas, counters)
+                write_site(nx, ny, SENESCENT, grid, deltas, counters)
+                visit(nx, ny, area, visited, counters)
+            else:
+                add_cell(x, y, SENESCENT, grid, new_x, new_y, new_state, occupied, deltas, counters)
+                visit(x, y, area, visited, counters)
+
+    return division_count, migration_count
+
+# Function to run one update step with the compiled kernel; a drop-in replacement for simulate_step
+# The kernel's generator is seeded from the run's numpy Generator at every step, so the Generator alone determines the run
+def simulate_step_jit(grid, cells, new_cells, senescence_probability, wound_tracker, grid_deltas, generator):
+    seed_kernel(int(generator.integers(2**32)))
+    # Every cell adds at most two new cells and three grid changes
+    while len(new_cells.x) < new_cells.size + 2 * len(cells):
+        new_cells.grow()
+    deltas = np.empty((3 * len(cells), 4), dtype=np.int64)
+    counters = np.zeros(3, dtype=np.int64)
+    counters[NEW_SIZE] = new_cells.size
+
+    offsets = neighbor_offsets(grid.shape)
+    division_count, migration_count = step_kernel(grid, lattice_of(grid), new_cells.claimed_sites, np.array(offsets.moore), np.array(offsets.upper), np.array(offsets.lower), offsets.split, cells.x, cells.y, cells.state, len(cells), new_cells.x, new_cells.y, new_cells.state,
+                                                  new_cells.occupied, wound_tracker.area, wound_tracker.visited, deltas, counters,
+                                                  senescence_probability, division_probability, death_probability, migration_probability,
+                                                  senescence_migration_probability)
+
+    new_cells.size = int(counters[NEW_SIZE])
+    wound_tracker.visited_count += int(counters[VISITED_COUNT])
+    grid_deltas.extend(map(tuple, deltas[:counters[DELTA_COUNT]].tolist()))
+
+    return int(division_count), int(migration_count)
@@ -0,0 +1,49 @@
+# lattice.py
+
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+from constants import EMPTY, WALL, STATE_DTYPE
+
+# Neighborhoods used by the cell actions, as (dx, dy) steps; every engine uses these tables
+MOORE_NEIGHBORS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+UPPER_NEIGHBORS = ((-1, 1), (0, 1), (1, 1))  # Directional migration of cells with y <= split (towards the center column)
+LOWER_NEIGHBORS = ((-1, -1), (0, -1), (1, -1))  # Directional migration of cells with y > split
+
+# The grid of a run is the interior of a lattice with a one-site border of WALL sites (never EMPTY, never claimable).
+# Sites are addressed by their flat index in the padded lattice, so the neighbor at (dx, dy) of a site is
+# site + dx * (Y + 2) + dy and no probe ever needs a bounds check.
+# split is the last column (y) whose cells migrate towards larger y; it is 49 on the 100 x 100 grid
+NeighborOffsets = namedtuple('NeighborOffsets', ['moore', 'upper', 'lower', 'split'])
+
+# Function to return the flat neighbor offsets of the padded lattice around a grid of the given shape (in the order of
+# MOORE_NEIGHBORS, UPPER_NEIGHBORS and LOWER_NEIGHBORS) and the column splitting the directional migration; computed once per grid shape
+@lru_cache(maxsize=None)
+def neighbor_offsets(shape):
+    width = shape[1] + 2
+    return NeighborOffsets(*(tuple(dx * width + dy for dx, dy in neighbors) for neighbors in (MOORE_NEIGHBORS, UPPER_NEIGHBORS, LOWER_NEIGHBORS)), shape[1] // 2 - 1)
+
+# Function to create an EMPTY grid of the given shape inside a WALL border; returns the interior view
+# (a view into the padded lattice, so writes to the grid are seen by the flat lattice and vice versa)
+def empty_lattice(shape, fill=EMPTY):
+    padded = np.full((shape[0] + 2, shape[1] + 2), WALL, dtype=STATE_DTYPE)
+    grid = padded[1:-1, 1:-1]
+    grid[...] = fill
+    return grid
+
+# Function to copy a plain grid into a new padded lattice; returns the interior view
+def padded_grid(grid):
+    padded_interior = empty_lattice(grid.shape)
+    padded_interior[...] = grid
+    return padded_interior
+
+# Function to return the padded lattice behind a grid created by empty_lattice or padded_grid, as a flat view
+def lattice_of(grid):
+    padded = grid.base
+    if padded is None or padded.shape != (grid.shape[0] + 2, grid.shape[1] + 2) or not padded.flags.c_contiguous:
+        raise ValueError("The grid is not the interior of a padded lattice; create it with empty_lattice or padded_grid")
+    return padded.ravel()
+
+# Function to return the flat index of position (x, y) of a grid of the given shape in its padded lattice
+def site_index(x, y, shape):
+    return (x + 1) * (shape[1] + 2) + y + 1
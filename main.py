@@ -1,17 +1,34 @@
 # main.py
 
 from simulation import run_simulation
+from sweep import run_sweep
+from tiled import run_tiled_simulation
+from trajectory import Trajectory, trajectory_filename
 from constants import *
-from utils import plot_combined_results, plot_avg_wound_closure_with_std, plot_results, create_simulation_video
+from utils import plot_combined_results, plot_avg_wound_closure_with_std, plot_results, create_simulation_video, calculate_permeability_batch
 # from slope_calculation import senescence_slope_calculation, permeability_slope_calculation
 
 if __name__ == "__main__":
     num_steps = 100
+    runs = 1
 
-    for senescent_prob in constant_senescence_probability:
-        run_simulation(senescent_prob, num_steps)
+    # for senescent_prob in constant_senescence_probability:
+    #     run_simulation(senescent_prob, num_steps)
 
-    # Directory where Excel files are saved
+    # Tissue-scale lattice split into strips over worker processes (one run; engine='jit' needs numba)
+    # run_tiled_simulation(0.1, num_steps, shape=(5000, 5000), engine='jit')
+
+    # Run every (senescence probability, run) job in parallel; pass base_seed to reproduce a sweep and max_workers to limit the pool
+    # Results go to the simulation_results store read by the plotting functions below; excel=True also writes workbooks
+    for senescent_prob, run, seed, df_results in run_sweep(constant_senescence_probability, num_steps, runs=runs):
+        print(f"Finished senescence probability {senescent_prob:.1e}, run {run + 1} (seed {seed})")
+
+    # Replay a run recorded with trajectory=True straight from disk, e.g. to compute a new metric or render a video
+    # trajectory = Trajectory(trajectory_filename(0.1, 0))
+    # permeability = calculate_permeability_batch(trajectory[1:])
+    # trajectory.to_video(fps=5)
+
+    # Directory of the results: a results store such as 'simulation_results', or a folder of Excel workbooks
     input_dir = '/Users/jihopark/Desktop/Jiho_IS/Lung_Epithelial_Simulation/Simple Model_hour base'  # Current directory
 
     # Generate the combined plots for all senescence probabilities
@@ -0,0 +1,63 @@
+# output_writer.py
+
+import queue
+import threading
+
+# Background output pipeline: write jobs (a function and its arguments, e.g. saving a frame or an Excel file) are put
+# on a bounded queue and run in order by one writer thread, so the simulation does not wait for disk I/O.
+# A full queue blocks submit until the writer catches up, which keeps the memory held by pending frames bounded.
+# The first error of a job is raised again by the next submit or by close; later jobs are then skipped.
+class OutputWriter:
+    def __init__(self, max_pending=16):
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self.drain, name='output-writer', daemon=True)
+        self.thread.start()
+
+    # Function run by the writer thread: run the queued jobs until the stop marker (None) arrives
+    def drain(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            if self.error is None:
+                function, args, kwargs = job
+                try:
+                    function(*args, **kwargs)
+                except Exception as error:
+                    self.error = error
+
+    # Function to raise the error of a failed job in the calling thread
+    def check(self):
+        if self.error is not None:
+            raise RuntimeError(f"Background output write failed: {self.error!r}") from self.error
+
+    # Function to queue a write job (blocks while max_pending jobs are waiting)
+    def submit(self, function, *args, **kwargs):
+        if self.closed:
+            raise RuntimeError("OutputWriter is closed")
+        self.check()
+        self.jobs.put((function, args, kwargs))
+
+    # Function to wait until every queued job has been written, stop the thread and report a failed job
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.jobs.put(None)
+            self.thread.join()
+        self.check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Always flush; an error raised inside the with block takes precedence over a write error
+        if exc_type is None:
+            self.close()
+        else:
+            try:
+                self.close()
+            except RuntimeError:
+                pass
+        return False
@@ -0,0 +1,91 @@
+# results_loader.py
+
+import os
+import re
+import pickle
+from results_store import ResultsStore
+
+# Per-run Excel files written by run_single_simulation(excel=True): division_migration_senescence_{p:.1e}_run_{n}.xlsx
+# (runs of the event-driven engine end in _gillespie.xlsx and are not mixed into the step model's results)
+RESULT_FILE_PATTERN = re.compile(r'^division_migration_senescence_(?P<probability>[^_]+)_run_(?P<run>\d+)\.xlsx$')
+# Part files of the ResultsStore, named relative to its root: senescence_probability={p:.1e}/run_{n}_seed_{seed}.{ext}
+# (again without the parts of the event-driven engine, which end in _gillespie.{ext})
+RESULT_PART_PATTERN = re.compile(r'^senescence_probability=(?P<probability>[^/\\]+)[/\\]run_(?P<run>\d+)_seed_\d+\.[a-z]+$')
+
+# Function to split a result file name (a workbook or a store part) into its senescence probability label (e.g. '1.0e-01')
+# and run label (e.g. '1')
+def parse_result_filename(file):
+    match = RESULT_FILE_PATTERN.match(file) or RESULT_PART_PATTERN.match(file)
+    if match is None:
+        raise ValueError(f"Not a result file name: {file}")
+    return match.group('probability'), match.group('run')
+
+# Function to list the result files of a directory as {name: path}: the parts of the ResultsStore rooted at input_dir
+# (e.g. 'simulation_results', where every run writes its results), or else the result workbooks in input_dir
+def result_files_of(input_dir, results_store):
+    parts = {os.path.relpath(path, input_dir): path for path in results_store.part_files()}
+    parts = {name: path for name, path in parts.items() if RESULT_PART_PATTERN.match(name)}
+    if parts:
+        return parts
+    return {file: os.path.join(input_dir, file) for file in sorted(os.listdir(input_dir)) if RESULT_FILE_PATTERN.match(file)}
+
+# Function to load the results of every run of a directory as {filename: DataFrame}, sorted by filename: the ResultsStore
+# parts under input_dir, or the result workbooks in it when it holds no store (see result_files_of)
+# The frames are cached on disk in input_dir/cache_name together with each file's mtime and size;
+# only files that are new or changed since the cache was written are read again (unreadable files are reported and skipped)
+def load_result_files(input_dir, cache_name='.division_migration_cache.pkl'):
+    import pandas as pd  # Imported here so that importing utils (which imports this module) does not load pandas
+    results_store = ResultsStore(input_dir)
+    cache_path = os.path.join(input_dir, cache_name)
+    cache = {}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                cache = pickle.load(cache_file)
+        except Exception as e:
+            print(f"Ignoring unreadable cache {cache_path}: {e}")
+
+    result_files = {}
+    fresh_cache = {}
+    for file, path in result_files_of(input_dir, results_store).items():
+        file_stat = os.stat(path)
+        signature = (file_stat.st_mtime_ns, file_stat.st_size)
+
+        if file in cache and cache[file][0] == signature:
+            df = cache[file][1]
+        else:
+            try:
+                if path.endswith('.xlsx'):
+                    df = pd.read_excel(path, engine='openpyxl')
+                else:
+                    df = results_store.read_part(path)
+            except Exception as e:
+                print(f"Error reading {file}: {e}")
+                continue
+        fresh_cache[file] = (signature, df)
+        result_files[file] = df
+
+    # Rewrite the cache only when a file was added, changed or removed; a directory that cannot be written to
+    # (read-only or shared data) just goes without the cache
+    if fresh_cache.keys() != cache.keys() or any(cache[file][0] != fresh_cache[file][0] for file in fresh_cache):
+        temporary_path = cache_path + '.tmp'
+        try:
+            with open(temporary_path, 'wb') as cache_file:
+                pickle.dump(fresh_cache, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, cache_path)
+        except OSError as e:
+            print(f"Not caching the results of {input_dir}: {e}")
+
+    return result_files
+
+# Function to load every result workbook of a directory as one consolidated DataFrame, with the filename,
+# the senescence probability label and the run label of each row in the 'File', 'Probability Label' and 'Run Label' columns
+def load_results(input_dir, cache_name='.division_migration_cache.pkl'):
+    import pandas as pd
+    frames = []
+    for file, df in load_result_files(input_dir, cache_name).items():
+        probability_label, run_label = parse_result_filename(file)
+        frames.append(df.assign(**{'File': file, 'Probability Label': probability_label, 'Run Label': run_label}))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,86 @@
+# results_store.py
+
+import os
+import glob
+
+# Function to pick the file format of a results store: Parquet when pyarrow is installed, CSV otherwise
+def default_format():
+    try:
+        import pyarrow
+        return 'parquet'
+    except ImportError:
+        return 'csv'
+
+FILE_EXTENSIONS = {'parquet': '.parquet', 'feather': '.feather', 'csv': '.csv'}
+
+# Engines that run the step model (simulate_step or an implementation with the same dynamics, also in tiled runs)
+STEP_MODEL_ENGINES = ('python', 'frontier', 'jit')
+
+# Function to return the file name suffix of a run's engine: none for the step model, '_{engine}' otherwise
+# (e.g. '_gillespie'), so runs of a different model never take the file names of step-model runs
+def engine_suffix(engine):
+    return '' if engine in STEP_MODEL_ENGINES else f'_{engine}'
+
+# Columnar store of the per-step results of a whole sweep, partitioned by senescence probability:
+#     {root}/senescence_probability={p:.1e}/run_{run + 1}_seed_{seed}{engine suffix}.{parquet|feather|csv}
+# Every run writes its own part file (so parallel sweep workers never share a file) with the key columns
+# 'Run' (1-based, as in the Excel filenames) and 'Seed' (as text) added; read loads the parts back as one DataFrame
+# (the 'Engine' column of the results tells the models apart).
+class ResultsStore:
+    def __init__(self, root='simulation_results', file_format=None):
+        self.root = root
+        self.file_format = default_format() if file_format is None else file_format
+        if self.file_format not in FILE_EXTENSIONS:
+            raise ValueError(f"Unknown results format {self.file_format!r}; expected one of {sorted(FILE_EXTENSIONS)}")
+
+    # Function to return the partition directory of a senescence probability
+    def partition(self, senescence_probability):
+        return os.path.join(self.root, f'senescence_probability={senescence_probability:.1e}')
+
+    # Function to write the results of one run (the part file appears complete or not at all)
+    def write(self, df_results, senescence_probability, run, seed, engine='python'):
+        directory = self.partition(senescence_probability)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'run_{run + 1}_seed_{seed}{engine_suffix(engine)}{FILE_EXTENSIONS[self.file_format]}')
+
+        df = df_results.copy()
+        df['Run'] = run + 1
+        df['Seed'] = str(seed)  # Seeds can exceed 64 bits
+        # Columns that mix numbers and text (e.g. 'Wound Closure Step' = 'Not closed yet') are stored as text
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].astype(str)
+
+        temporary_path = path + '.tmp'
+        if self.file_format == 'parquet':
+            df.to_parquet(temporary_path, index=False)
+        elif self.file_format == 'feather':
+            df.to_feather(temporary_path)
+        else:
+            df.to_csv(temporary_path, index=False)
+        os.replace(temporary_path, path)
+        return path
+
+    # Function to list the part files of the store (optionally only those of the given senescence probabilities)
+    def part_files(self, senescence_probabilities=None):
+        if senescence_probabilities is None:
+            pattern = os.path.join(self.root, 'senescence_probability=*', '*' + FILE_EXTENSIONS[self.file_format])
+            return sorted(glob.glob(pattern))
+        return sorted(path for senescence_probability in senescence_probabilities
+                      for path in glob.glob(os.path.join(self.partition(senescence_probability), '*' + FILE_EXTENSIONS[self.file_format])))
+
+    # Function to load the results of one run from its part file
+    def read_part(self, path):
+        import pandas as pd
+        if self.file_format == 'parquet':
+            return pd.read_parquet(path)
+        if self.file_format == 'feather':
+            return pd.read_feather(path)
+        return pd.read_csv(path)
+
+    # Function to load the results of every stored run as one DataFrame
+    def read(self, senescence_probabilities=None):
+        import pandas as pd
+        frames = [self.read_part(path) for path in self.part_files(senescence_probabilities)]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
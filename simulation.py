@@ -1,151 +1,294 @@
 # simulation.py
 
 import numpy as np
-import random
-import time
+import os
+from contextlib import nullcontext
 from constants import *
 from initialization import initialize_grid, initialize_cells
-from cell_actions import check_senescence_migration, random_action
+from cell_actions import check_senescence_migration, random_action, add_cell, write_site, draw_step_randoms, choose, NEIGHBOR_DRAW, DEATH_DRAW, SENESCENCE_DRAW
 from utils import *
-import pandas as pd
+from tracking import PermeabilityTracker, WoundTracker
+from cell_store import CellStore
+from lattice import MOORE_NEIGHBORS, neighbor_offsets, lattice_of
+from output_writer import OutputWriter
+from cadence import OutputCadence
+from results_store import ResultsStore, engine_suffix
+from checkpoint import save_checkpoint, load_checkpoint, run_state, restore_run_state, checkpoint_filename
+from trajectory import TrajectoryWriter, trajectory_filename
 
-def run_simulation(senescence_probability, num_steps, runs=1):
-    for run in range(runs):
-        # Seed the random number generator with the current time at the start of each run
-        random.seed(time.time())
+# Function to run one update step over all cells (the grid is updated in place for moves and divisions)
+# cells holds the cells of the current step; new_cells must be empty and collects the cells of the next step
+# generator is the run's numpy Generator; the random numbers of the step are drawn from it in blocks up front
+def simulate_step(grid, cells, new_cells, senescence_probability, wound_tracker, grid_deltas, generator):
+    # Process cell actions and update grid, cell positions, and cell states here
+    migration_count = 0
+    division_count = 0
+    step_draws, action_orders = (block.tolist() for block in draw_step_randoms(generator, len(cells)))
+    # Neighbors are probed by flat index in the padded lattice behind the grid (see lattice.py)
+    lattice, offsets = lattice_of(grid), neighbor_offsets(grid.shape)
+    width = grid.shape[1] + 2
+
+    for i, (x, y, state) in enumerate(cells.shuffled(generator)):
+        division_count, migration_count = update_cell(x, y, (x + 1) * width + y + 1, state, step_draws[i], action_orders[i], grid, lattice, offsets, new_cells, grid_deltas,
+                                                      senescence_probability, wound_tracker, division_count, migration_count)
+
+    return division_count, migration_count
+
+# Function to update one cell at flat index site of the padded lattice, with its row of uniform numbers (draws) and its
+# action order (see draw_step_randoms); returns the division and migration counts of the step so far
+def update_cell(x, y, site, state, draws, action_order, grid, lattice, offsets, new_cells, grid_deltas, senescence_probability, wound_tracker, division_count, migration_count):
+    if state == ALIVE:
+        migration_count = random_action(x, y, site, grid, lattice, offsets, new_cells, grid_deltas, migration_count, division_probability, death_probability, migration_probability, wound_tracker, draws, action_order)
+
+    elif state == DIVIDING:
+        # Collect open neighbors (EMPTY and not yet claimed in this step)
+        open_neighbors = [(x + dx, y + dy) for (dx, dy), offset in zip(MOORE_NEIGHBORS, offsets.moore)
+                          if lattice[site + offset] == EMPTY and not new_cells.claimed_sites[site + offset]]
+
+        # If there's an open spot, divide the cell and place the new cell
+        if open_neighbors:
+            new_position = choose(open_neighbors, draws[NEIGHBOR_DRAW])  # Randomly choose one open neighbor
+
+            if draws[DEATH_DRAW] < death_probability:
+                add_cell(x, y, DEAD, new_cells, grid, grid_deltas)
+            elif draws[SENESCENCE_DRAW] < senescence_probability:
+                add_cell(x, y, SENESCENT, new_cells, grid, grid_deltas)  # Add the new cell position
+            else:
+                add_cell(new_position[0], new_position[1], ALIVE, new_cells, grid, grid_deltas)  # Add the new cell position
+                add_cell(x, y, ALIVE, new_cells, grid, grid_deltas)
+                division_count += 1  # Count division
+                # Update the grid promptly in order to reflect the current grid status for next cells' division and migration in a single update step
+                write_site(new_position[0], new_position[1], ALIVE, grid, grid_deltas)
+
+                # If the new cell is placed in the wound region, mark it as updated
+                wound_tracker.visit(new_position[0], new_position[1])
+
+        # If there is no open neighbor, the original cell change back to ALIVE
+        else:
+            add_cell(x, y, ALIVE, new_cells, grid, grid_deltas)
+
+    elif state == DEAD:
+        add_cell(x, y, EMPTY, new_cells, grid, grid_deltas)
+        # Update the grid promptly in order to reflect the current grid status for next cells' division and migration in a single update step
+        write_site(x, y, EMPTY, grid, grid_deltas)
+        # The EMPTY entry is dropped when the new cells are compacted at the end of the step
+
+    elif state == SENESCENT:
+        move_status, migration_count = check_senescence_migration(x, y, site, grid, lattice, offsets, new_cells, grid_deltas, migration_count, senescence_migration_probability, wound_tracker, draws)
+        if not move_status:
+            add_cell(x, y, SENESCENT, new_cells, grid, grid_deltas)  # Senescent cells remain senescent
+            wound_tracker.visit(x, y)  # Mark the position as updated if it lies in the wound region
+
+    return division_count, migration_count
+
+# Function to pick the step function of an engine: 'python' (simulate_step), 'frontier' (the active-frontier engine
+# of frontier.py, same results as simulate_step) or 'jit' (the numba kernel of jit_kernel.py)
+# The 'jit' engine falls back to simulate_step when numba is not installed; jit_kernel (and numba) is only imported for it
+def select_step_function(engine):
+    if engine == 'python':
+        return simulate_step
+    if engine == 'frontier':
+        from frontier import FrontierEngine
+        return FrontierEngine().step  # One engine per run: it keeps per-site counts between steps
+    if engine == 'jit':
+        from jit_kernel import JIT_AVAILABLE, simulate_step_jit
+        if JIT_AVAILABLE:
+            return simulate_step_jit
+        print("numba is not installed; falling back to the Python engine")
+        return simulate_step
+    raise ValueError(f"Unknown engine {engine!r}; expected 'python', 'frontier' or 'jit'")
+
+# wound_bounds gives the first and last wound row (x) used for the closure check and the Wound Area metric
+# debug=True cross-checks the incrementally tracked permeability and wound area against full-grid scans on every step
+# engine selects the step implementation (see select_step_function), or 'gillespie' for the event-driven engine of gillespie.py
+# video='mp4' or 'gif' streams every frame into simulation_videos while the run goes; save_images=False skips the PNG frames
+# background_io=True writes frames, videos and Excel files on a background thread (see OutputWriter) while the runs go on
+# frame_every, metrics_every and closure_window set how often frames are rendered and metrics recorded (see OutputCadence)
+# Results go to the ResultsStore under results_dir; excel=True also writes the per-run Excel file
+# checkpoint_every=n saves every run's state every n steps to checkpoint_{p}_run_{n}.npz; resume=True continues each run
+# from its checkpoint (runs without one start from the beginning), e.g. after the process was killed
+# trajectory=True records every run's lattice at every step to trajectory_{p}_run_{n}.traj (see trajectory.py)
+def run_simulation(senescence_probability, num_steps, runs=1, wound_bounds=(wound_x_min, wound_x_max), debug=False, engine='python', save_images=True, video=None, fps=5, background_io=False,
+                   frame_every=1, metrics_every=1, closure_window=0, results_dir='simulation_results', excel=False, checkpoint_every=None, resume=False, trajectory=False):
+    # Leaving the block waits for every pending write and raises if one failed
+    with (OutputWriter() if background_io else nullcontext()) as output_writer:
+        for run in range(runs):
+            run_resume = resume and os.path.exists(checkpoint_filename(senescence_probability, run))
+            run_single_simulation(senescence_probability, num_steps, run, wound_bounds=wound_bounds, debug=debug, engine=engine, save_images=save_images, video=video, fps=fps, output_writer=output_writer,
+                                  frame_every=frame_every, metrics_every=metrics_every, closure_window=closure_window, results_dir=results_dir, excel=excel,
+                                  checkpoint_every=checkpoint_every, resume=run_resume, trajectory=trajectory)
+
+# Function to continue the run saved in a checkpoint up to num_steps (senescence probability, run and seed are read from the file)
+# The other arguments must match those of the interrupted run for the result to be identical to an uninterrupted run
+def resume_simulation(checkpoint_path, num_steps, **kwargs):
+    state = load_checkpoint(checkpoint_path)
+    return run_single_simulation(float(state['senescence_probability']), num_steps, int(state['run']), checkpoint_path=checkpoint_path, resume=True, **kwargs)
+
+# Function to simulate one run (run is the 0-based run index used in the output filenames) and save its results
+# seed makes the run reproducible; every random number of the run comes from one numpy Generator seeded with it
+# (through a SeedSequence). Without a seed, fresh entropy from the operating system is used; the seed is recorded in the results
+# Only the steps whose metrics are due under the cadence get a row in the results (every step by default)
+# The results are written to the ResultsStore under results_dir, keyed by senescence probability, run and seed;
+# excel=True also writes division_migration_senescence_{p}_run_{n}.xlsx
+# checkpoint_every=n saves the complete state of the run every n steps to checkpoint_path (a compressed NumPy archive,
+# by default checkpoint_{p}_run_{n}.npz); resume=True continues from that file instead of starting over, and the
+# resumed run produces exactly the results of an uninterrupted one. A resumed video only holds the frames from the resume step on.
+# trajectory=True records the lattice of every step (step 0 included) to trajectory_path (a memory-mapped file, by default
+# trajectory_{p}_run_{n}.traj), which Trajectory reads back; a resumed run continues the file of the interrupted one
+def run_single_simulation(senescence_probability, num_steps, run, seed=None, wound_bounds=(wound_x_min, wound_x_max), debug=False, engine='python', save_images=True, video=None, fps=5, output_writer=None,
+                          frame_every=1, metrics_every=1, closure_window=0, results_dir='simulation_results', excel=False, checkpoint_every=None, checkpoint_path=None, resume=False,
+                          trajectory=False, trajectory_path=None):
+    if engine == 'gillespie':
+        if checkpoint_every or resume or closure_window:
+            raise ValueError("The 'gillespie' engine does not support checkpoints or a closure window")
+        from gillespie import run_gillespie_simulation
+        return run_gillespie_simulation(senescence_probability, num_steps, run, seed=seed, wound_bounds=wound_bounds, debug=debug, save_images=save_images, video=video, fps=fps, output_writer=output_writer,
+                                        frame_every=frame_every, metrics_every=metrics_every, results_dir=results_dir, excel=excel, trajectory=trajectory, trajectory_path=trajectory_path)
+    step_function = select_step_function(engine)
+    if checkpoint_path is None:
+        checkpoint_path = checkpoint_filename(senescence_probability, run)
+    if trajectory_path is None:
+        trajectory_path = trajectory_filename(senescence_probability, run)
+
+    cadence = OutputCadence(frame_every, metrics_every, closure_window)
+    video_writer = open_video_writer(run, senescence_probability, fps=fps, video_format=video) if video else None  # Frames are appended as they are rendered
+
+    if resume:
+        # Restore the grid, cells, trackers, recorded results and random number generator state of the checkpoint
+        state = load_checkpoint(checkpoint_path)
+        if float(state['senescence_probability']) != senescence_probability or int(state['run']) != run:
+            raise ValueError(f"Checkpoint {checkpoint_path} belongs to senescence probability {float(state['senescence_probability'])}, run {int(state['run'])}")
+        seed = int(state['seed'])
+        generator = np.random.default_rng(np.random.SeedSequence(seed))
+        start_step, grid, cells, permeability_tracker, wound_tracker, pending_deltas, results, wound_closed_step = restore_run_state(state, wound_bounds, cadence, generator, debug=debug)
+        print(f"Resuming from step {start_step}")
+    else:
+        # One generator per run, so runs in parallel workers never share a random stream
+        # (a 128-bit seed from the operating system cannot collide the way clock-based seeds can)
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        generator = np.random.default_rng(np.random.SeedSequence(seed))
 
         grid = initialize_grid(grid_size_x, grid_size_y)
         cell_positions, cell_states = initialize_cells(grid_size_x, grid_size_x)
-        
-        results = []
-        division_counts = []
-        migration_counts = []
-        avg_permeability_lst = []
-        wound_empty_dead_counts = []  # List to store the count of EMPTY/DEAD in wound area per step
-        wound_positions = set() # Variable to track when all wound area is update
+        start_step = 0
+
+        # Visualize the initial grid of alive and wound area (0-29 and 70-99: alive, 30-69: wound)
+        grid, color_grid = update_grid(grid, cell_positions, cell_states, grid_size_x, grid_size_y)
+        visualize_grid(color_grid, 0, run, senescence_probability, save_images=save_images, writer=video_writer, output_writer=output_writer)
+        print(0)
+        cells = CellStore.from_arrays(cell_positions, cell_states, grid.shape)
+        permeability_tracker = PermeabilityTracker(grid, debug=debug)
+        wound_tracker = WoundTracker(grid, wound_bounds[0], wound_bounds[1], debug=debug) # Tracks when all wound positions are updated
+
+        results = []  # One row per step whose metrics are recorded
         wound_closed_step = None # To record the step when all wound positions are updated
-        wound_area = set((x, y) for x in range(30, 70) for y in range(grid_size_y)) # Define the full set of wound positions (x = 30 to x = 69 across all y)
-        senescent_counts = []
-
-        for step in range(num_steps):
-            # Visualize the initial grid of alive and wound area (0-29 and 70-99: alive, 30-69: wound)
-            if step == 0:
-                color_grid, grid = update_grid(grid, cell_positions, cell_states, grid_size_x, grid_size_y)
-                visualize_grid(color_grid, step, run, senescence_probability, save_images=True)
-                print(step)
-
-            # Process cell actions and update grid, cell positions, and cell states here
-            new_positions, new_states = [], []
-            migration_count = 0
-            division_count = 0
-
-            indices = list(range(cell_positions.shape[0]))
-            random.shuffle(indices)
-
-            for i in indices:
-                x, y = cell_positions[i]
-                state = cell_states[i]
-
-                if state == ALIVE:
-                    migration_count = random_action(x, y, grid, new_positions, new_states, migration_count, division_probability, death_probability, migration_probability, wound_positions)
-
-                elif state == DIVIDING:
-                    neighbors = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-                    random.shuffle(neighbors)
-            
-                    open_neighbors = []  # List to store valid, open neighbors
-            
-                    # Collect open neighbors
-                    for dx, dy in neighbors:
-                        nx, ny = x + dx, y + dy
-                
-                        # Ensure the new position is within the grid boundaries
-                        if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]:
-                            if grid[nx, ny] == EMPTY and (nx, ny) not in new_positions:  # Check if the spot is open (empty)
-                                open_neighbors.append((nx, ny))
-            
-                    # If there's an open spot, divide the cell and place the new cell
-                    if open_neighbors:
-                        new_position = random.choice(open_neighbors)  # Randomly choose one open neighbor
-
-                        if random.random() < death_probability:
-                            new_states.append(DEAD)
-                            new_positions.append((x, y))
-                        elif random.random() < senescence_probability:
-                            new_states.append(SENESCENT)
-                            new_positions.append((x, y))  # Add the new cell position
-                        else:
-                            new_states.append(ALIVE)
-                            new_positions.append(new_position)  # Add the new cell position
-                            new_states.append(ALIVE)
-                            new_positions.append((x, y))
-                            division_count += 1  # Count division
-                            # Update the grid promptly in order to reflect the current grid status for next cells' division and migration in a single update step
-                            grid[new_position[0], new_position[1]] = ALIVE
-
-                            # If the new cell is placed in the wound region, mark it as updated
-                            if (30 <= new_position[0] <= 69):
-                                wound_positions.add((new_position[0], new_position[1]))  # Add this position to the updated wound positions
-
-                    # If there is no open neighbor, the original cell change back to ALIVE
-                    else:
-                        new_states.append(ALIVE)
-                        new_positions.append((x, y))
-
-                elif state == DEAD:
-                    new_states.append(EMPTY)
-                    new_positions.append((x, y))
-                    # Update the grid promptly in order to reflect the current grid status for next cells' division and migration in a single update step
-                    grid[x, y] = EMPTY
-                    # Dead cells are not added to new_states or new_positions after this cycle
-                    continue  # Skip adding this cell to the new lists
-                
-                elif state == SENESCENT:
-                    move_status, migration_count = check_senescence_migration(x, y, grid, new_positions, new_states, migration_count, senescence_migration_probability, wound_positions)
-                    if not move_status:
-                        new_states.append(SENESCENT)  # Senescent cells remain senescent
-                        new_positions.append((x, y))
-                        if 30 <= x <= 69:  # If the cell moves into the wound region, mark the wound position as updated
-                            wound_positions.add((x, y))
-                    else:
-                        continue # Skip further processing for this cell
-            
-            # After processing all cells for this step, check if the wound area is fully updated
-            if wound_area == wound_positions and wound_closed_step is None:
-                wound_closed_step = step + 1
-                print(f"All wound positions were updated at step {wound_closed_step}")
-            
-            # Store the division and migration count for each step of update
-            division_counts.append(division_count)
-            migration_counts.append(migration_count)
-
-            # Update positions and states
-            cell_positions, cell_states = np.array(new_positions), np.array(new_states)
-            
-            # Visualization (update_grid will update the grid and return the color grid to visualize using visualize_grid)
-            color_grid, grid = update_grid(grid, cell_positions, cell_states, grid_size_x, grid_size_y)
-            visualize_grid(color_grid, step + 1, run, senescence_probability, save_images=True)
-            print(step)
-
-            # Calculate and append the permeability for each step
-            avg_permeability_lst.append(calculate_permeability(grid))
-
-            # Count EMPTY or DEAD cells in the wound area for this step
-            empty_dead_count = sum(1 for (x, y) in wound_area if grid[x, y] in {EMPTY, DEAD})
-            wound_empty_dead_counts.append(empty_dead_count)
-
-            # Count the number of SENESCENT cell
-            senescent_counts.append(np.sum(cell_states == 3))
-
-        # Save data
-        for step in range(num_steps):
-            results.append([senescence_probability, step + 1, division_counts[step], migration_counts[step], avg_permeability_lst[step], wound_empty_dead_counts[step], senescent_counts[step]])
-
-        filename = f'division_migration_senescence_{senescence_probability:.1e}_run_{run + 1}.xlsx'
-        df_results = pd.DataFrame(results, columns=['Senescence Probability', 'Step', 'Division Count', 'Migration Count', 'Average Permeability', 'Wound Area', 'Senescent_Count'])
-        # Reorder columns to move 'Senescent Count' to the last position
-        df_results['Wound Closure Step'] = wound_closed_step if wound_closed_step is not None else 'Not closed yet'
-        df_results.to_excel(filename, index=False)
-
-        # # Plot the data
-        # plot_results(filename)
+        pending_deltas = []  # Grid changes not yet passed to the permeability and wound trackers
+
+    new_cells = CellStore(grid.shape, capacity=len(cells.x))
+
+    trajectory_writer = TrajectoryWriter(trajectory_path, num_steps, grid.shape, senescence_probability, run, seed, engine=engine, resume=resume) if trajectory else None
+    if trajectory_writer is not None and not resume:
+        trajectory_writer.write(0, grid)
+    if trajectory_writer is not None and resume and trajectory_writer.header['last_step'] < start_step:
+        trajectory_writer.close()
+        raise ValueError(f"Trajectory {trajectory_path} ends at step {trajectory_writer.header['last_step']}, before the resume step {start_step}")
+
+    for step in range(start_step, num_steps):
+        # Process cell actions and update grid, cell positions, and cell states here
+        grid_deltas = []  # (x, y, old state, new state) changes made during this step
+        division_count, migration_count = step_function(grid, cells, new_cells, senescence_probability, wound_tracker, grid_deltas, generator)
+
+        # After processing all cells for this step, check if the wound area is fully updated
+        if wound_tracker.is_closed() and wound_closed_step is None:
+            wound_closed_step = step + 1
+            print(f"All wound positions were updated at step {wound_closed_step}")
+
+            # The held steps before the closure are now inside the dense window: render them and record the metrics they miss
+            cadence.close_wound(wound_closed_step)
+            for held_step, (held_grid, held_division_count, held_migration_count, metrics_recorded) in cadence.release():
+                if cadence.frame_due(held_step):
+                    visualize_grid(held_grid, held_step, run, senescence_probability, save_images=save_images, writer=video_writer, output_writer=output_writer)
+                if not metrics_recorded and cadence.metrics_due(held_step, num_steps):
+                    results.append([senescence_probability, held_step, held_division_count, held_migration_count, calculate_permeability(held_grid), wound_tracker.count_open(held_grid), int(np.count_nonzero(held_grid == SENESCENT))])
+
+        # Update positions and states (the old store is emptied and reused for the next step)
+        cells, new_cells = new_cells, cells
+        cells.compact()
+        new_cells.clear()
+        cell_states = cells.states()
+        
+        # apply_grid_deltas brings the grid up to date and returns a color grid view to visualize using visualize_grid
+        grid, color_grid = apply_grid_deltas(grid, grid_deltas)
+        pending_deltas.extend(grid_deltas)
+        if trajectory_writer is not None:
+            trajectory_writer.write(step + 1, grid)
+
+        metrics_recorded = cadence.metrics_due(step + 1, num_steps)
+        if metrics_recorded:
+            # Bring the trackers up to date with the net changes since they were last updated
+            grid_deltas = net_grid_deltas(grid, pending_deltas)
+            pending_deltas = []
+            permeability_tracker.apply_deltas(grid, grid_deltas)
+            wound_tracker.apply_deltas(grid_deltas)
+
+            # Store the division and migration count, the permeability, the EMPTY or DEAD count in the wound area and the SENESCENT count
+            results.append([senescence_probability, step + 1, division_count, migration_count, permeability_tracker.permeability(grid), wound_tracker.wound_area(grid), np.sum(cell_states == 3)])
+
+        # Visualization (steps that may still fall into the window before the closure are held back until that is known)
+        if cadence.holding():
+            released = cadence.hold(step + 1, (grid.copy(), division_count, migration_count, metrics_recorded))
+            if released is not None and cadence.frame_due(released[0]):
+                visualize_grid(released[1][0], released[0], run, senescence_probability, save_images=save_images, writer=video_writer, output_writer=output_writer)
+        elif cadence.frame_due(step + 1):
+            visualize_grid(color_grid, step + 1, run, senescence_probability, save_images=save_images, writer=video_writer, output_writer=output_writer)
+        print(step)
+
+        # Save the state after this step
+        if checkpoint_every and (step + 1) % checkpoint_every == 0:
+            save_checkpoint(checkpoint_path, run_state(step + 1, senescence_probability, run, seed, generator, grid, cells, permeability_tracker, wound_tracker, pending_deltas, results, wound_closed_step, cadence))
+
+    # Render the steps still held back (the wound did not close)
+    for held_step, (held_grid, _, _, _) in cadence.release():
+        if cadence.frame_due(held_step):
+            visualize_grid(held_grid, held_step, run, senescence_probability, save_images=save_images, writer=video_writer, output_writer=output_writer)
+
+    if video_writer is not None:
+        if output_writer is not None:
+            output_writer.submit(video_writer.close)  # Queued after the run's last frame
+        else:
+            video_writer.close()
+    if trajectory_writer is not None:
+        trajectory_writer.close()
+
+    return save_run_results(results, senescence_probability, run, seed, wound_closed_step, results_dir=results_dir, excel=excel, output_writer=output_writer, engine=engine)
+
+# Function to save the results rows of a run to the ResultsStore under results_dir (and, with excel=True, to
+# division_migration_senescence_{p}_run_{n}.xlsx); returns them as a DataFrame
+# engine is recorded in the 'Engine' column; runs of an engine other than the step model's also carry it in their
+# file names (e.g. division_migration_senescence_{p}_run_{n}_gillespie.xlsx, see engine_suffix)
+def save_run_results(results, senescence_probability, run, seed, wound_closed_step, results_dir='simulation_results', excel=False, output_writer=None, engine='python'):
+    # Save data (rows of held steps are recorded late, so sort them by step)
+    results.sort(key=lambda row: row[1])
+
+    filename = f'division_migration_senescence_{senescence_probability:.1e}_run_{run + 1}{engine_suffix(engine)}.xlsx'
+    import pandas as pd  # Only loaded once a run has results to export
+    df_results = pd.DataFrame(results, columns=['Senescence Probability', 'Step', 'Division Count', 'Migration Count', 'Average Permeability', 'Wound Area', 'Senescent_Count'])
+    # Reorder columns to move 'Senescent Count' to the last position
+    df_results['Wound Closure Step'] = wound_closed_step if wound_closed_step is not None else 'Not closed yet'
+    df_results['Seed'] = str(seed)  # As text: seeds of up to 128 bits do not survive Excel's floating-point numbers
+    df_results['Engine'] = engine
+    results_store = ResultsStore(results_dir)
+    if output_writer is not None:
+        output_writer.submit(results_store.write, df_results, senescence_probability, run, seed, engine)
+        if excel:
+            output_writer.submit(df_results.to_excel, filename, index=False)
+    else:
+        results_store.write(df_results, senescence_probability, run, seed, engine)
+        if excel:
+            df_results.to_excel(filename, index=False)
+
+    # # Plot the data
+    # plot_results(filename)
+
+    return df_results
@@ -1,6 +1,7 @@
 import os
 import pandas as pd
 from sklearn.linear_model import LinearRegression
+from results_loader import load_result_files, parse_result_filename
 import numpy as np
 
 # # File path to your directory
@@ -79,47 +80,38 @@ def div_mig_slope_avg_calculation(file_path):
     senescence_slope_data = {}
 
     # Loop through the files in the directory
-    for file in os.listdir(file_path):
-        if file.endswith('.xlsx') and 'division_migration_senescence' in file:
-            # Read the first sheet of each file using the 'openpyxl' engine
-            filepath = os.path.join(file_path, file)
-            try:
-                df = pd.read_excel(filepath, engine='openpyxl')  # Specify the engine as 'openpyxl'
-            except Exception as e:
-                print(f"Error reading {file}: {e}")
-                continue
-
-            # Extract wound closure column
-            wound_closure_step = df['Wound Closure Step'].iloc[0]
-
-            # Calculate the range of steps to consider: wound_closure_step ±5
-            time_steps = range(wound_closure_step - 4, wound_closure_step + 7)
-            filtered_df = df[df['Step'].isin(time_steps)]
-            
-            # Ensure we have 11 time steps (5 before, 1 at closure, 5 after)
-            if len(filtered_df) == 11:
-                steps = filtered_df['Step'].values.reshape(-1, 1)
-
-                # Calculate slope for Division Count
-                division_values = filtered_df['Division Count'].values
-                model = LinearRegression()
-                model.fit(steps, division_values)
-                division_slope = model.coef_[0]
-
-                # Calculate slope for Migration Count
-                migration_values = filtered_df['Migration Count'].values
-                model.fit(steps, migration_values)
-                migration_slope = model.coef_[0]
-
-                # Extract the senescence probability from the file name
-                probability = file.split('_')[3]  # e.g., "1.0e-01"
-
-                # Store the data
-                if probability not in senescence_slope_data:
-                    senescence_slope_data[probability] = {'division_slopes': [], 'migration_slopes': []}
-
-                senescence_slope_data[probability]['division_slopes'].append(division_slope)
-                senescence_slope_data[probability]['migration_slopes'].append(migration_slope)
+    for file, df in load_result_files(file_path).items():
+        # Extract wound closure column
+        wound_closure_step = df['Wound Closure Step'].iloc[0]
+
+        # Calculate the range of steps to consider: wound_closure_step ±5
+        time_steps = range(wound_closure_step - 4, wound_closure_step + 7)
+        filtered_df = df[df['Step'].isin(time_steps)]
+        
+        # Ensure we have 11 time steps (5 before, 1 at closure, 5 after)
+        if len(filtered_df) == 11:
+            steps = filtered_df['Step'].values.reshape(-1, 1)
+
+            # Calculate slope for Division Count
+            division_values = filtered_df['Division Count'].values
+            model = LinearRegression()
+            model.fit(steps, division_values)
+            division_slope = model.coef_[0]
+
+            # Calculate slope for Migration Count
+            migration_values = filtered_df['Migration Count'].values
+            model.fit(steps, migration_values)
+            migration_slope = model.coef_[0]
+
+            # Extract the senescence probability from the file name
+            probability, _ = parse_result_filename(file)  # e.g., "1.0e-01"
+
+            # Store the data
+            if probability not in senescence_slope_data:
+                senescence_slope_data[probability] = {'division_slopes': [], 'migration_slopes': []}
+
+            senescence_slope_data[probability]['division_slopes'].append(division_slope)
+            senescence_slope_data[probability]['migration_slopes'].append(migration_slope)
 
     # Compute the average slopes for each senescence probability
     avg_slope_per_senescence = {
@@ -141,7 +133,8 @@ def div_mig_slope_avg_calculation(file_path):
     print(f"Results saved to {output_file}")
 
 # Example usage
-div_mig_slope_avg_calculation(file_path)
+if __name__ == "__main__":
+    div_mig_slope_avg_calculation(file_path)
 
 # def senescence_slope_calculation(file_path):
 #     # Loop through the files in the directory
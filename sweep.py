@@ -0,0 +1,48 @@
+# sweep.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from simulation import run_single_simulation
+
+# Function to derive an independent, reproducible seed for one (senescence probability, run) job
+# (the job's position in the sweep is the spawn key, so the seed does not depend on worker count or completion order)
+def job_seed(base_seed, probability_index, run):
+    seed_sequence = np.random.SeedSequence(base_seed, spawn_key=(probability_index, run))
+    return int(seed_sequence.generate_state(1, dtype=np.uint64)[0])
+
+# Function executed in a worker process for one job
+def run_sweep_job(senescence_probability, num_steps, run, seed, engine='python', results_dir='simulation_results', excel=False, trajectory=False):
+    df_results = run_single_simulation(senescence_probability, num_steps, run, seed=seed, engine=engine, results_dir=results_dir, excel=excel, trajectory=trajectory)
+    return senescence_probability, run, seed, df_results
+
+# Function to run every (senescence probability, run) pair of a sweep over a process pool
+# Yields (senescence_probability, run, seed, df_results) as each job finishes; each job writes its own part file
+# of the results store under results_dir (and division_migration_senescence_{p}_run_{n}.xlsx with excel=True)
+# and its own frames, so no two jobs share an output name.
+# Passing the same base_seed reproduces every job of the sweep; without it a fresh base seed is drawn.
+# engine selects the step implementation of every job ('python', 'frontier', 'jit' or 'gillespie', see run_single_simulation).
+# trajectory=True also records every job's lattices to its own trajectory_{p}_run_{n}.traj (see trajectory.py).
+def run_sweep(senescence_probabilities, num_steps, runs=1, max_workers=None, base_seed=None, engine='python', results_dir='simulation_results', excel=False, trajectory=False):
+    # Probabilities that format to the same label would write to the same files
+    labels = [f'{senescence_probability:.1e}' for senescence_probability in senescence_probabilities]
+    if len(set(labels)) != len(labels):
+        raise ValueError(f"Senescence probabilities must be distinct at 1e precision to get distinct output files: {labels}")
+
+    if base_seed is None:
+        base_seed = np.random.SeedSequence().entropy
+        print(f"Sweep base seed: {base_seed}")
+
+    jobs = [(senescence_probability, run, job_seed(base_seed, probability_index, run))
+            for probability_index, senescence_probability in enumerate(senescence_probabilities)
+            for run in range(runs)]
+
+    # Never start more workers than there are jobs or cores
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(jobs)))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_sweep_job, senescence_probability, num_steps, run, seed, engine, results_dir, excel, trajectory) for senescence_probability, run, seed in jobs]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,194 @@
+# tiled.py
+
+import os
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from constants import *
+from cell_store import CellStore
+from tracking import WoundTracker
+
+# Domain-decomposed runs on large lattices: the padded lattice, the mask of the positions claimed in the current step and
+# the mask of the visited wound positions live in shared memory, and the rows are split into strips, one per worker process.
+# Each strip is updated in two phases, its first half and then its second half, with every worker in the same phase
+# at the same time. A cell reads and writes only within one site of itself, so two cells can only interfere if their rows
+# are at most two apart; the halves updated at the same time are separated by a half of at least two rows that is not
+# being updated, so no two workers ever touch the same site. The halo rows of a strip are read straight from the shared
+# lattice: the barriers between the phases are the only exchange needed.
+# Within a phase every worker updates the cells of its half sequentially in a random order with the engine's step
+# function, so a step visits the cells of all first halves before those of all second halves (the per-cell update is that
+# of simulate_step, the visiting order is not). Runs are reproducible for a given seed and number of workers.
+
+MIN_HALF_ROWS = 2  # Rows of each half of a strip (see above)
+
+# Function to create the initial lattice of a tissue of the given shape inside a WALL border, in the layout of
+# initialize_cells scaled to the shape: ALIVE cells in the first and last 30% of the columns, an EMPTY wound between them
+def initial_tissue(padded):
+    padded[...] = WALL
+    grid = padded[1:-1, 1:-1]
+    grid[...] = EMPTY
+    edge = grid.shape[1] * 3 // 10
+    grid[:, :edge] = ALIVE
+    grid[:, grid.shape[1] - edge:] = ALIVE
+    return grid
+
+# Function to return the row bounds of the strips of a lattice with the given number of rows
+def strip_bounds(rows, workers):
+    return [(rows * k // workers, rows * (k + 1) // workers) for k in range(workers)]
+
+# Function to count the permeable edges of the cells in rows first..last - 1 of the grid and the number of those cells,
+# as count_open_edges does for the whole grid (the WALL border is not permeable)
+def strip_open_edges(padded, first, last):
+    block = padded[first:last + 2]  # The strip's rows with one halo row on each side
+    permeable = (block == EMPTY) | (block == SENESCENT)
+    rows = block[1:-1, 1:-1]
+    cells = (rows != EMPTY) & (rows != DEAD)
+    open_edges = permeable[:-2, 1:-1].astype(np.int64) + permeable[2:, 1:-1] + permeable[1:-1, :-2] + permeable[1:-1, 2:]
+    return int(open_edges[cells].sum()), int(np.count_nonzero(cells))
+
+# Function to attach to the shared arrays of a run (the SharedMemory objects must be kept alive while the arrays are in use)
+def attach_shared(names, shape):
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    padded_shape = (shape[0] + 2, shape[1] + 2)
+    padded = np.ndarray(padded_shape, dtype=STATE_DTYPE, buffer=blocks[0].buf)
+    claimed = np.ndarray(padded_shape, dtype=bool, buffer=blocks[1].buf)
+    visited = np.ndarray(shape, dtype=bool, buffer=blocks[2].buf)
+    return blocks, padded, claimed, visited
+
+# Function run by each worker process: updates the cells of one strip on every 'step' command received on connection
+# and sends back the strip's (division count, migration count, permeable edges, cells, wound area, senescent cells, newly visited)
+def tile_worker(connection, barrier, names, shape, bounds, seed_sequence, senescence_probability, wound_bounds, engine):
+    from simulation import select_step_function
+    blocks, padded, claimed, visited = attach_shared(names, shape)
+    grid = padded[1:-1, 1:-1]
+    step_function = select_step_function(engine)
+    generator = np.random.default_rng(seed_sequence)
+    wound_tracker = WoundTracker(grid, wound_bounds[0], wound_bounds[1], visited=visited)  # Marks the shared visited mask
+    first, last = bounds
+    halves = ((first, (first + last) // 2), ((first + last) // 2, last))
+    # Cells of each half at the start of the step (only visited, so they claim nothing and hold no mask), and the cells
+    # they leave for the next step (claiming in the shared mask): a worker holds no full-lattice array of its own
+    cells = [CellStore(shape, claimed=False) for _ in halves]
+    new_cells = [CellStore(shape, claimed=claimed) for _ in halves]
+    wound_rows = slice(max(first, wound_bounds[0]), min(last, wound_bounds[1] + 1))
+
+    while connection.recv() == 'step':
+        # Collect the cells of both halves before any neighbor starts writing into this strip
+        for half_cells, (start, stop) in zip(cells, halves):
+            xs, ys = np.nonzero(grid[start:stop] != EMPTY)
+            half_cells.clear()
+            half_cells.extend(xs + start, ys, grid[xs + start, ys])
+        barrier.wait()
+
+        division_count = migration_count = 0
+        visited_before = wound_tracker.visited_count
+        for half_cells, half_new_cells in zip(cells, new_cells):
+            grid_deltas = []
+            divisions, migrations = step_function(grid, half_cells, half_new_cells, senescence_probability, wound_tracker, grid_deltas, generator)
+            division_count += divisions
+            migration_count += migrations
+            # The deferred state changes of the half only touch sites next to it, which no other worker uses in this phase
+            for x, y, old_state, new_state in grid_deltas:
+                grid[x, y] = new_state
+            barrier.wait()
+
+        open_edges, cell_count = strip_open_edges(padded, first, last)
+        wound_area = int(np.count_nonzero((grid[wound_rows] == EMPTY) | (grid[wound_rows] == DEAD)))
+        senescent_count = int(np.count_nonzero(grid[first:last] == SENESCENT))
+        # Every worker has finished the step, so the claims can be released for the next one
+        for half_new_cells in new_cells:
+            half_new_cells.clear()
+        connection.send((division_count, migration_count, open_edges, cell_count, wound_area, senescent_count, wound_tracker.visited_count - visited_before))
+
+    for block in blocks:
+        block.close()
+
+# Function to simulate one run on a lattice of the given shape split over worker processes; returns the per-step results
+# as a DataFrame with the columns of run_single_simulation and writes them to the ResultsStore under results_dir
+# (and to the Excel file with excel=True). The per-strip counts are summed into the outputs of the whole lattice.
+# wound_bounds defaults to the rows of the default wound (30% to 70% of the rows); engine is 'python' or 'jit'.
+# Frames are not rendered: a tissue-scale lattice is far larger than a useful image; trajectory_path records the lattice
+# of every step to a trajectory file instead (see trajectory.py)
+def run_tiled_simulation(senescence_probability, num_steps, run=0, shape=(grid_size_x, grid_size_y), workers=None, seed=None, wound_bounds=None, engine='python', results_dir='simulation_results', excel=False,
+                         trajectory_path=None):
+    from simulation import save_run_results
+    from trajectory import TrajectoryWriter
+    if engine not in ('python', 'jit'):
+        raise ValueError(f"Tiled runs support the 'python' and 'jit' engines, got {engine!r}")
+    if wound_bounds is None:
+        wound_bounds = (shape[0] * 3 // 10, shape[0] * 7 // 10 - 1)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, shape[0] // (2 * MIN_HALF_ROWS)))
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    seed_sequences = np.random.SeedSequence(seed).spawn(workers)  # One independent random stream per strip
+
+    # Shared lattice (STATE_DTYPE keeps a 5,000 x 5,000 lattice at 25 MB), claimed mask and visited mask
+    padded_shape = (shape[0] + 2, shape[1] + 2)
+    sizes = (padded_shape[0] * padded_shape[1] * np.dtype(STATE_DTYPE).itemsize, padded_shape[0] * padded_shape[1], shape[0] * shape[1])
+    blocks = [shared_memory.SharedMemory(create=True, size=size) for size in sizes]
+    try:
+        _, padded, claimed, visited = attach_shared([block.name for block in blocks], shape)
+        grid = initial_tissue(padded)
+        claimed[...] = True
+        claimed[1:-1, 1:-1] = False
+        visited[...] = False
+        wound_size = (wound_bounds[1] + 1 - wound_bounds[0]) * shape[1]
+        trajectory_writer = TrajectoryWriter(trajectory_path, num_steps, shape, senescence_probability, run, seed, engine=engine) if trajectory_path else None
+        if trajectory_writer is not None:
+            trajectory_writer.write(0, grid)
+
+        context = multiprocessing.get_context()
+        barrier = context.Barrier(workers)
+        connections, processes = [], []
+        for bounds, seed_sequence in zip(strip_bounds(shape[0], workers), seed_sequences):
+            parent_end, worker_end = context.Pipe()
+            process = context.Process(target=tile_worker, args=(worker_end, barrier, [block.name for block in blocks], shape, bounds, seed_sequence, senescence_probability, wound_bounds, engine), daemon=True)
+            process.start()
+            connections.append(parent_end)
+            processes.append(process)
+
+        results = []
+        wound_closed_step = None
+        visited_count = 0
+        start = time.perf_counter()
+        try:
+            for step in range(num_steps):
+                for connection in connections:
+                    connection.send('step')
+                strips = np.array([connection.recv() for connection in connections])
+                division_count, migration_count, open_edges, cell_count, wound_area, senescent_count, newly_visited = strips.sum(axis=0)
+
+                visited_count += newly_visited
+                if visited_count == wound_size and wound_closed_step is None:
+                    wound_closed_step = step + 1
+                    print(f"All wound positions were updated at step {wound_closed_step}")
+
+                permeability = open_edges / 4 / cell_count if cell_count > 0 else 0.0
+                results.append([senescence_probability, step + 1, int(division_count), int(migration_count), permeability, int(wound_area), int(senescent_count)])
+                if trajectory_writer is not None:
+                    trajectory_writer.write(step + 1, grid)  # The workers are idle until the next command
+                print(step)
+        except BaseException:
+            barrier.abort()  # Releases the workers waiting at a barrier for a strip that failed
+            raise
+        finally:
+            for connection in connections:
+                try:
+                    connection.send('stop')
+                except OSError:
+                    pass  # The worker is gone
+            for process in processes:
+                process.join()
+            if trajectory_writer is not None:
+                trajectory_writer.close()
+        elapsed = time.perf_counter() - start
+        print(f"{shape[0]} x {shape[1]} lattice on {workers} workers: {elapsed / max(num_steps, 1):.3f} s per step")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return save_run_results(results, senescence_probability, run, seed, wound_closed_step, results_dir=results_dir, excel=excel, engine=engine)
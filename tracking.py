@@ -0,0 +1,121 @@
+# tracking.py
+
+import numpy as np
+from constants import EMPTY, DEAD
+from utils import calculate_permeability, count_open_edges
+
+# Lookup tables indexed by state + 1 (EMPTY = -1 maps to index 0)
+IS_CELL = (False, False, True, True, True)  # Sites counted as cells (not EMPTY or DEAD)
+IS_PERMEABLE = (True, False, False, False, True)  # Edge neighbors counted as permeable (EMPTY or SENESCENT)
+
+# Incremental permeability accumulator: keeps the sum of permeable edges over all cells and the cell count,
+# and adjusts them for a changed site and its four edge neighbors instead of rescanning the whole grid.
+# With debug=True every value is cross-checked against calculate_permeability.
+class PermeabilityTracker:
+    def __init__(self, grid, debug=False):
+        self.debug = debug
+        self.states = grid.copy()  # States the running sums currently account for
+        self.rows, self.cols = grid.shape
+        open_edge_sum, cell_count = count_open_edges(grid)
+        self.open_edge_sum, self.cell_count = int(open_edge_sum), int(cell_count)
+
+    # Function to count the permeable edge neighbors of a site
+    def open_edges(self, x, y):
+        states = self.states
+        count = 0
+        if x > 0 and IS_PERMEABLE[states[x - 1, y] + 1]:
+            count += 1
+        if x < self.rows - 1 and IS_PERMEABLE[states[x + 1, y] + 1]:
+            count += 1
+        if y > 0 and IS_PERMEABLE[states[x, y - 1] + 1]:
+            count += 1
+        if y < self.cols - 1 and IS_PERMEABLE[states[x, y + 1] + 1]:
+            count += 1
+        return count
+
+    # Function to sum the permeable edges of the cells at a site and its four edge neighbors
+    def local_open_edge_sum(self, x, y):
+        total = 0
+        for nx, ny in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < self.rows and 0 <= ny < self.cols and IS_CELL[self.states[nx, ny] + 1]:
+                total += self.open_edges(nx, ny)
+        return total
+
+    # Function to bring the running sums up to date with the grid's state at (x, y)
+    def update(self, grid, x, y):
+        old_state, new_state = self.states[x, y], grid[x, y]
+        if old_state == new_state:
+            return
+        before = self.local_open_edge_sum(x, y)
+        self.states[x, y] = new_state
+        self.open_edge_sum += self.local_open_edge_sum(x, y) - before
+        self.cell_count += IS_CELL[new_state + 1] - IS_CELL[old_state + 1]
+
+    # Function to apply the (x, y, old state, new state) deltas of a step once they are in the grid (sites may repeat)
+    def apply_deltas(self, grid, grid_deltas):
+        for x, y, old_state, new_state in grid_deltas:
+            self.update(grid, x, y)
+
+    # Function to return the average permeability, as calculate_permeability would for the tracked grid
+    def permeability(self, grid=None):
+        avg_permeability = self.open_edge_sum / 4 / self.cell_count if self.cell_count > 0 else 0.0
+        if self.debug:
+            expected = calculate_permeability(self.states if grid is None else grid)
+            if avg_permeability != expected:
+                raise RuntimeError(f"Incremental permeability {avg_permeability} does not match calculate_permeability {expected}")
+        return avg_permeability
+
+IS_OPEN = (True, True, False, False, False)  # Sites counted as open wound (EMPTY or DEAD)
+
+# Wound region tracker: a boolean mask of the wound rows (x = wound_x_min..wound_x_max across all y) with running counts of
+# the sites ever visited by a cell and the sites currently EMPTY or DEAD, so the closure check and the Wound Area metric are O(1).
+# With debug=True the open-site count is cross-checked against a full scan of the wound region.
+# visited can be given as an existing mask of the grid's shape (e.g. in shared memory, see tiled.py); visited_count
+# then only counts the positions this tracker marked.
+class WoundTracker:
+    def __init__(self, grid, wound_x_min, wound_x_max, debug=False, visited=None):
+        self.debug = debug
+        # One flag per row, broadcast across the columns: the mask takes no memory of the grid's size
+        wound_rows = np.zeros((grid.shape[0], 1), dtype=bool)
+        wound_rows[wound_x_min:wound_x_max + 1] = True
+        self.area = np.broadcast_to(wound_rows, grid.shape)
+        self.rows = slice(wound_x_min, wound_x_max + 1)
+        self.visited = np.zeros(grid.shape, dtype=bool) if visited is None else visited
+        self.size = int(np.count_nonzero(self.area))
+        self.visited_count = 0
+        self.empty_dead_count = self.count_open(grid)
+
+    # Function to count the EMPTY or DEAD sites of the wound region with a full scan of a grid
+    def count_open(self, grid):
+        wound = grid[self.rows]
+        return int(np.count_nonzero((wound == EMPTY) | (wound == DEAD)))
+
+    # Function to mark a position as updated by a cell if it lies in the wound region
+    def visit(self, x, y):
+        if self.area[x, y] and not self.visited[x, y]:
+            self.visited[x, y] = True
+            self.visited_count += 1
+
+    # Function to mark many distinct positions as updated at once (same as calling visit for each)
+    def visit_all(self, xs, ys):
+        fresh = self.area[xs, ys] & ~self.visited[xs, ys]
+        self.visited[xs[fresh], ys[fresh]] = True
+        self.visited_count += int(np.count_nonzero(fresh))
+
+    # Function to update the open-site count with the net (x, y, old state, new state) deltas of a step
+    def apply_deltas(self, grid_deltas):
+        for x, y, old_state, new_state in grid_deltas:
+            if self.area[x, y]:
+                self.empty_dead_count += IS_OPEN[new_state + 1] - IS_OPEN[old_state + 1]
+
+    # Function to check whether every position in the wound region has been updated
+    def is_closed(self):
+        return self.visited_count == self.size
+
+    # Function to return the number of EMPTY or DEAD sites in the wound region
+    def wound_area(self, grid=None):
+        if self.debug and grid is not None:
+            expected = self.count_open(grid)
+            if self.empty_dead_count != expected:
+                raise RuntimeError(f"Tracked wound area {self.empty_dead_count} does not match the grid count {expected}")
+        return self.empty_dead_count
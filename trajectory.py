@@ -0,0 +1,107 @@
+# trajectory.py
+
+import os
+import json
+import numpy as np
+from constants import STATE_DTYPE
+from constants import division_probability, death_probability, migration_probability, senescence_migration_probability
+
+# Trajectory file of a run: a fixed-size header followed by the lattice of every step as one (steps, X, Y) array of
+# STATE_DTYPE, step 0 being the initial grid. The header is the magic line below and a JSON object padded with spaces
+# to HEADER_SIZE bytes; it holds the grid size, the number of allocated steps, the last step written so far and the
+# run's parameters and seed. The file is preallocated when the run starts, so a step is written in place with one copy
+# and any step or range can be read back through a memory map without loading the rest of the file.
+MAGIC = b'WOUND-TRAJECTORY 1\n'
+HEADER_SIZE = 4096
+
+# Function to return the default trajectory file of a run (next to its checkpoint and Excel file)
+def trajectory_filename(senescence_probability, run):
+    return f'trajectory_{senescence_probability:.1e}_run_{run + 1}.traj'
+
+# Function to read the header of a trajectory file as a dict
+def read_header(path):
+    with open(path, 'rb') as trajectory_file:
+        header = trajectory_file.read(HEADER_SIZE)
+    if not header.startswith(MAGIC):
+        raise ValueError(f"{path} is not a trajectory file")
+    return json.loads(header[len(MAGIC):].decode())
+
+# Writer of the trajectory of one run: preallocates the file for steps 0..num_steps and writes each step's grid in place
+# resume=True reopens the file of an interrupted run (e.g. together with its checkpoint) and grows it if num_steps is larger;
+# the file must exist, since the steps before the resume step cannot be recorded any more
+class TrajectoryWriter:
+    def __init__(self, path, num_steps, shape, senescence_probability, run, seed, engine='python', resume=False):
+        self.path = path
+        if resume:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No trajectory {path} to resume: the interrupted run did not record one")
+            self.header = read_header(path)
+            if tuple(self.header['shape']) != tuple(shape):
+                raise ValueError(f"Trajectory {path} holds a {self.header['shape']} grid, not {list(shape)}")
+            self.header['steps'] = max(self.header['steps'], num_steps + 1)
+        else:
+            self.header = {'shape': list(shape), 'dtype': np.dtype(STATE_DTYPE).name, 'steps': num_steps + 1, 'last_step': -1,
+                           'senescence_probability': senescence_probability, 'run': run, 'seed': str(seed), 'engine': engine,
+                           'division_probability': division_probability, 'death_probability': death_probability,
+                           'migration_probability': migration_probability, 'senescence_migration_probability': senescence_migration_probability}
+            with open(path, 'wb'):
+                pass
+
+        # Allocate the whole file up front (sparse where the file system allows it)
+        step_bytes = shape[0] * shape[1] * np.dtype(STATE_DTYPE).itemsize
+        with open(path, 'r+b') as trajectory_file:
+            trajectory_file.truncate(HEADER_SIZE + self.header['steps'] * step_bytes)
+        self.header_bytes = np.memmap(path, dtype=np.uint8, mode='r+', shape=(HEADER_SIZE,))
+        self.lattices = np.memmap(path, dtype=STATE_DTYPE, mode='r+', offset=HEADER_SIZE, shape=(self.header['steps'], *shape))
+        self.write_header()
+
+    # Function to write the header into the first HEADER_SIZE bytes of the file
+    def write_header(self):
+        header = MAGIC + json.dumps(self.header).encode()
+        if len(header) > HEADER_SIZE:
+            raise ValueError(f"The trajectory header needs {len(header)} bytes, more than {HEADER_SIZE}")
+        self.header_bytes[:] = np.frombuffer(header.ljust(HEADER_SIZE, b' '), dtype=np.uint8)
+
+    # Function to store the grid at the end of a step (step 0 is the initial grid)
+    def write(self, step, grid):
+        self.lattices[step] = grid
+        if step > self.header['last_step']:
+            self.header['last_step'] = step
+            self.write_header()
+
+    # Function to flush the file and release the memory maps
+    def close(self):
+        self.lattices.flush()
+        self.header_bytes.flush()
+        del self.lattices, self.header_bytes
+
+# Reader of a trajectory file: trajectory[step] is the (X, Y) grid of a step and trajectory[first:last] a (steps, X, Y) stack,
+# both read-only views into the memory-mapped file (no copy), covering the steps written so far (0..last_step).
+# Stacks can be passed straight to the batched metrics, e.g. calculate_permeability_batch(trajectory[10:50]).
+class Trajectory:
+    def __init__(self, path):
+        self.path = path
+        self.header = read_header(path)
+        self.shape = tuple(self.header['shape'])
+        lattices = np.memmap(path, dtype=np.dtype(self.header['dtype']), mode='r', offset=HEADER_SIZE, shape=(self.header['steps'], *self.shape))
+        self.lattices = lattices[:self.header['last_step'] + 1]
+
+    def __len__(self):
+        return len(self.lattices)
+
+    def __getitem__(self, index):
+        return self.lattices[index]
+
+    # Function to apply a metric of one grid to every step in [first, last) (all steps by default); returns a NumPy array
+    def replay(self, metric, first=0, last=None):
+        return np.array([metric(grid) for grid in self.lattices[first:last]])
+
+    # Function to render the steps in [first, last) into a video ('mp4' or 'gif') named like the run's streamed video
+    def to_video(self, first=0, last=None, output_dir='simulation_videos', fps=5, video_format='mp4', upscale=4):
+        from utils import open_video_writer, render_frame, save_frame
+        writer = open_video_writer(self.header['run'], self.header['senescence_probability'], output_dir=output_dir, fps=fps, video_format=video_format)
+        try:
+            for grid in self.lattices[first:last]:
+                save_frame(render_frame(grid, upscale=upscale), writer=writer)
+        finally:
+            writer.close()
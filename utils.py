@@ -1,34 +1,61 @@
 # utils.py
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 import numpy as np
-from matplotlib.colors import ListedColormap
 from constants import EMPTY, DEAD, ALIVE, DIVIDING, SENESCENT
 import os
-import pandas as pd
-import imageio
 import glob
+from results_loader import load_result_files, parse_result_filename
+from lattice import empty_lattice
 
+# matplotlib, imageio and pandas are imported inside the functions that plot, encode or read files, so importing
+# this module (and simulation.py, which imports it) stays cheap for simulation-only processes such as sweep workers
 
 # Create custom colormap and legend for visualization
-cmap = ListedColormap(['white', 'red', 'green', 'blue', 'yellow'])  # [EMPTY, DEAD, ALIVE, DIVIDING, SENESCENT]
+state_colors = ['white', 'red', 'green', 'blue', 'yellow']  # [EMPTY, DEAD, ALIVE, DIVIDING, SENESCENT]
+# RGB colors of state_colors as uint8 (matplotlib's to_rgb * 255), indexed by state + 1 (EMPTY = -1 maps to index 0)
+palette = np.array([[255, 255, 255], [255, 0, 0], [0, 128, 0], [0, 0, 255], [255, 255, 0]], dtype=np.uint8)
+
+# The matplotlib colormap utils.cmap is built on first access
+def __getattr__(name):
+    if name == 'cmap':
+        from matplotlib.colors import ListedColormap
+        return ListedColormap(state_colors)
+    raise AttributeError(f"module 'utils' has no attribute {name!r}")
 
 def create_legend():
+    import matplotlib.patches as mpatches
     legend_labels = ['EMPTY', 'DEAD', 'ALIVE', 'DIVIDING', 'SENESCENT']
     legend_colors = ['white', 'red', 'green', 'blue', 'yellow']
     return [mpatches.Patch(color=legend_colors[i], label=legend_labels[i]) for i in range(1, 5)]  # Exclude 'EMPTY'
 
+# Function to rebuild the grid from scratch out of the cell positions and states (used for the initial grid)
 def update_grid(grid, cell_positions, cell_states, grid_size_x, grid_size_y):
-    # Clear the grid and assign different colors based on cell state
-    grid = np.full((grid_size_x, grid_size_y), EMPTY)  # Initialize the grid to EMPTY (-1)
-    color_grid = np.full((grid_size_x, grid_size_y), EMPTY)  # Initialize color grid for visualization
-    for pos, state in zip(cell_positions, cell_states):
-        grid[pos[0], pos[1]] = state
-        color_grid[pos[0], pos[1]] = state
+    # Clear the grid and assign different colors based on cell state (positions are expected to be unique)
+    grid = empty_lattice((grid_size_x, grid_size_y))  # Initialize the grid to EMPTY (-1) inside a WALL border
+    grid[cell_positions[:, 0], cell_positions[:, 1]] = cell_states
+    color_grid = grid.view()  # The color grid shares the grid's memory
+
+    return grid, color_grid
+
+# Function to bring the grid up to date by applying only the (x, y, old state, new state) deltas recorded during a step
+# (deltas are applied in the order they were recorded, so the last change to a site wins)
+def apply_grid_deltas(grid, grid_deltas):
+    for x, y, old_state, new_state in grid_deltas:
+        grid[x, y] = new_state
+
+    color_grid = grid.view()  # The color grid shares the grid's memory
 
     return grid, color_grid
 
+# Function to reduce the deltas of a step to one net (x, y, old state, new state) change per site, once they are applied to the grid
+# (every grid change in a step is recorded, so the first recorded old state of a site is its state at the start of the step)
+def net_grid_deltas(grid, grid_deltas):
+    old_states = {}
+    for x, y, old_state, new_state in grid_deltas:
+        old_states.setdefault((x, y), old_state)
+
+    return [(x, y, old_state, grid[x, y]) for (x, y), old_state in old_states.items() if grid[x, y] != old_state]
+
 # def visualize_grid(color_grid, step, run_number, senescence_probability, save_images=False):
 #     output_dir='simulation_images'
 
@@ -50,29 +77,81 @@ def update_grid(grid, cell_positions, cell_states, grid_size_x, grid_size_y):
 #     plt.pause(0.1)
 #     plt.clf()
 
-def visualize_grid(color_grid, step, run_number, senescence_probability, save_images=False):
+# def visualize_grid(color_grid, step, run_number, senescence_probability, save_images=False):
+#     output_dir = 'simulation_images'
+
+#     # Create the plot without axes or any extra elements
+#     plt.imshow(color_grid, cmap=cmap, vmin=-1, vmax=3)
+#     plt.axis('off')  # Turn off axis
+
+#     # Save the image if required
+#     if save_images:
+#         # Ensure the output directory exists (exist_ok, since parallel sweep workers may create it at the same time)
+#         os.makedirs(output_dir, exist_ok=True)
+#         # Save the image with a descriptive filename
+#         filename = os.path.join(output_dir, f'run_{run_number + 1}_senescence_{senescence_probability:.1e}_step_{step:03d}.png')
+#         plt.savefig(filename, bbox_inches='tight', pad_inches=0, dpi=100)  # Set dpi for 100x100 pixels
+#     plt.clf()  # Clear the plot after saving
+
+# Function to map a state grid straight to an RGB uint8 image through the cmap palette (one pixel per site,
+# rows of the grid are image rows as with plt.imshow); upscale > 1 enlarges every site to an upscale x upscale block
+def render_frame(color_grid, upscale=1):
+    frame = palette[np.asarray(color_grid) + 1]
+    if upscale > 1:
+        frame = frame.repeat(upscale, axis=0).repeat(upscale, axis=1)
+    return frame
+
+# Function to write a rendered frame to a PNG file and/or append it to an open video or GIF writer
+def save_frame(frame, filename=None, writer=None):
+    import imageio
+    if filename is not None:
+        imageio.imwrite(filename, frame)
+    if writer is not None:
+        writer.append_data(frame)
+
+# Function to render the grid and save it as a PNG frame (without matplotlib; upscale=4 gives frames about the size of the old savefig output)
+# writer is an open video or GIF writer (see open_video_writer) that receives the frame directly
+# output_writer is an OutputWriter: the frame is then written by its background thread instead of here
+def visualize_grid(color_grid, step, run_number, senescence_probability, save_images=False, upscale=4, writer=None, output_writer=None):
     output_dir = 'simulation_images'
 
-    # Create the plot without axes or any extra elements
-    plt.imshow(color_grid, cmap=cmap, vmin=-1, vmax=3)
-    plt.axis('off')  # Turn off axis
+    frame = render_frame(color_grid, upscale)  # A new array, so the grid may change while the frame waits to be written
 
     # Save the image if required
+    filename = None
     if save_images:
-        # Ensure the output directory exists
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        # Ensure the output directory exists (exist_ok, since parallel sweep workers may create it at the same time)
+        os.makedirs(output_dir, exist_ok=True)
         # Save the image with a descriptive filename
         filename = os.path.join(output_dir, f'run_{run_number + 1}_senescence_{senescence_probability:.1e}_step_{step:03d}.png')
-        plt.savefig(filename, bbox_inches='tight', pad_inches=0, dpi=100)  # Set dpi for 100x100 pixels
-    plt.clf()  # Clear the plot after saving
+
+    if filename is not None or writer is not None:
+        if output_writer is not None:
+            output_writer.submit(save_frame, frame, filename, writer)
+        else:
+            save_frame(frame, filename, writer)
+
+    return frame
+
+# Function to open the video ('mp4') or GIF ('gif') writer that the frames of one run are streamed into
+def open_video_writer(run_number, senescence_probability, output_dir='simulation_videos', fps=5, video_format='mp4'):
+    import imageio
+    os.makedirs(output_dir, exist_ok=True)
+    video_filename = os.path.join(output_dir, f'simulation_run_{run_number + 1}_senescence_{senescence_probability:.1e}.{video_format}')
+    if video_format == 'gif':
+        return imageio.get_writer(video_filename, duration=1000 / fps, loop=0)  # The GIF writer takes the frame duration in ms
+    if video_format == 'mp4':
+        return imageio.get_writer(video_filename, fps=fps)
+    raise ValueError(f"Unknown video format {video_format!r}; expected 'mp4' or 'gif'")
 
 def create_simulation_video(run_number, senescence_probability, frames_dir='simulation_images', output_dir='simulation_videos', fps=5):
+    import imageio
     os.makedirs(output_dir, exist_ok=True)
     video_filename = os.path.join(output_dir, f'simulation_run_{run_number + 1}_senescence_{senescence_probability:.1e}.mp4')
 
-    # Collect all frame files in order
-    frame_files = sorted([os.path.join(frames_dir, f) for f in os.listdir(frames_dir) if f.endswith('.png') and f'run_{run_number + 1}' in f])
+    # Collect the frame files of this run and senescence probability in order (frames of other runs may share the directory)
+    frame_prefix = f'run_{run_number + 1}_senescence_{senescence_probability:.1e}_step_'
+    frame_files = sorted([os.path.join(frames_dir, f) for f in os.listdir(frames_dir) if f.endswith('.png') and f.startswith(frame_prefix)])
 
     # Write frames to video
     with imageio.get_writer(video_filename, fps=fps) as writer:
@@ -83,113 +162,101 @@ def create_simulation_video(run_number, senescence_probability, frames_dir='simu
     print(f"Video saved as {video_filename}")
 
 def calculate_permeability(grid):
-    # Calculate the permeability
-    edge_neighbors = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-    avg_permeability_sum = 0
-    cell_count = 0
-    avg_permeability = 0
-
-    # Cache grid dimensions to avoid repeated calls to len(grid)
-    grid_rows = len(grid)
-    grid_cols = len(grid[0])
-
-    # Loop through every cell in the grid
-    for width in range(grid_rows):
-        for length in range(grid_cols):
-            # Check if the grid cell is not EMPTY or DEAD
-            if grid[width, length] not in {EMPTY, DEAD}:  
-                cell_count += 1
-                single_cell_permeability_sum = 0
-
-                # Check neighboring cells
-                for dx, dy in edge_neighbors:
-                    nx, ny = width + dx, length + dy
-                    # Ensure we stay within grid bounds
-                    if 0 <= nx < grid_rows and 0 <= ny < grid_cols:
-                        # Check if neighbor is EMPTY or SENESCENT
-                        if grid[nx, ny] in {EMPTY, SENESCENT}:
-                            single_cell_permeability_sum += 1
-
-                # Add the permeability score of the current cell
-                avg_permeability_sum += single_cell_permeability_sum / 4  # Dividing by 4 to average the permeability score for the cell
-
-    # Only calculate the final average if we have valid cells
-    if cell_count > 0:
-        avg_permeability = avg_permeability_sum / cell_count
-    
+    # Calculate the permeability of a single grid (see calculate_permeability_batch)
+    return float(calculate_permeability_batch(grid))
+
+# Function to count, for each grid in a stack (..., X, Y), the permeable edges summed over its cells and the number of cells
+def count_open_edges(grids):
+    grids = np.asarray(grids)
+
+    # A site holds a cell if it is not EMPTY or DEAD; an edge neighbor is permeable if it is EMPTY or SENESCENT
+    cells = (grids != EMPTY) & (grids != DEAD)
+    permeable = (grids == EMPTY) | (grids == SENESCENT)
+
+    # Count the permeable edge neighbors of every site by shifting the mask one step in each direction (out of bounds counts as closed)
+    open_edges = np.zeros(grids.shape, dtype=np.int64)
+    open_edges[..., 1:, :] += permeable[..., :-1, :]
+    open_edges[..., :-1, :] += permeable[..., 1:, :]
+    open_edges[..., :, 1:] += permeable[..., :, :-1]
+    open_edges[..., :, :-1] += permeable[..., :, 1:]
+
+    return np.where(cells, open_edges, 0).sum(axis=(-2, -1)), cells.sum(axis=(-2, -1))
+
+# Function to calculate the permeability of a stack of grids (..., X, Y) in one call, e.g. the saved steps of a run or many replicates
+def calculate_permeability_batch(grids):
+    # Average the per-cell permeability (open edges / 4) over the cells of each grid
+    open_edge_sum, cell_count = count_open_edges(grids)
+    avg_permeability = np.divide(open_edge_sum / 4, cell_count, out=np.zeros(cell_count.shape), where=cell_count > 0)
+
     return avg_permeability
 
 # Function to plot Division Count and Migration Count vs Step
 def plot_results(input_dir, output_dir='wound_closure_plot_results'):
-    for file in os.listdir(input_dir):
-        if file.endswith('.xlsx') and 'division_migration_senescence' in file:
-            # Load the results from the Excel file
-            filepath = os.path.join(input_dir, file)
-            df = pd.read_excel(filepath)
-    
-            # Extract data for plotting
-            step = df['Step']
-            division_count = df['Division Count']
-            migration_count = df['Migration Count']
-            avg_permeability = df['Average Permeability']
-            senescence_probability = df['Senescence Probability'].iloc[0]
-            wound_closure_step = df['Wound Closure Step'].iloc[0]
-
-            # Create the plot
-            plt.figure(figsize=(12, 6))
-
-            # Plot Division Count
-            plt.plot(step, division_count, label='Division Count', color='blue', linestyle='-', marker='o')
-
-            # Plot Migration Count
-            plt.plot(step, migration_count, label='Migration Count', color='green', linestyle='-', marker='x')
-
-            # Add titles and labels
-            plt.title(f'Division and Migration Counts vs Step (Senescence Probability: {senescence_probability:.1e})')
-            plt.xlabel('Step')
-            plt.ylabel('Count / Permeability')
-            plt.legend()
-
-            # Add text annotation for wound closure step
-            if wound_closure_step != 'Not closed yet':
-                plt.axvline(x=wound_closure_step, color='red', linestyle='--', label=f'Wound Closure Step: {wound_closure_step}')
-                plt.text(wound_closure_step + 1, max(division_count.max(), migration_count.max()) * 0.9,
-                        f'Wound Closure Step: {wound_closure_step}', color='red')
-
-            # Ensure the output directory exists
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-
-            # Save the plot to a file in the new directory
-            plot_filename = os.path.join(output_dir, os.path.basename('division_migration_step').replace('.xlsx', '.png'))
-            plt.savefig(plot_filename)
-
-            # Show the plot
-            plt.close()
-
-
-            # Plot Average Permeability separately
-            plt.figure(figsize=(12, 6))
-
-            # Plot Average Permeability
-            plt.plot(step, avg_permeability, label='Average Permeability', color='orange', linestyle='-', marker='s')
-
-            # Add titles and labels
-            plt.title(f'Average Permeability vs Step (Senescence Probability: {senescence_probability:.1e})')
-            plt.xlabel('Step')
-            plt.ylabel('Average Permeability')
-            plt.legend()
-
-            # Add text annotation for wound closure step (optional, since it may not make sense here)
-            if wound_closure_step != 'Not closed yet':
-                plt.axvline(x=wound_closure_step, color='red', linestyle='--', label=f'Wound Closure Step: {wound_closure_step}')
-                plt.text(wound_closure_step + 1, avg_permeability.max() * 0.9,
-                        f'Wound Closure Step: {wound_closure_step}', color='red')
-
-            # Save the Average Permeability plot
-            plot_filename = os.path.join(output_dir, os.path.basename('permeability_step').replace('.xlsx', '_avg_permeability.png'))
-            plt.savefig(plot_filename)
-            plt.close()
+    import matplotlib.pyplot as plt
+    for file, df in load_result_files(input_dir).items():
+        # Extract data for plotting
+        step = df['Step']
+        division_count = df['Division Count']
+        migration_count = df['Migration Count']
+        avg_permeability = df['Average Permeability']
+        senescence_probability = df['Senescence Probability'].iloc[0]
+        wound_closure_step = df['Wound Closure Step'].iloc[0]
+
+        # Create the plot
+        plt.figure(figsize=(12, 6))
+
+        # Plot Division Count
+        plt.plot(step, division_count, label='Division Count', color='blue', linestyle='-', marker='o')
+
+        # Plot Migration Count
+        plt.plot(step, migration_count, label='Migration Count', color='green', linestyle='-', marker='x')
+
+        # Add titles and labels
+        plt.title(f'Division and Migration Counts vs Step (Senescence Probability: {senescence_probability:.1e})')
+        plt.xlabel('Step')
+        plt.ylabel('Count / Permeability')
+        plt.legend()
+
+        # Add text annotation for wound closure step
+        if wound_closure_step != 'Not closed yet':
+            plt.axvline(x=wound_closure_step, color='red', linestyle='--', label=f'Wound Closure Step: {wound_closure_step}')
+            plt.text(wound_closure_step + 1, max(division_count.max(), migration_count.max()) * 0.9,
+                    f'Wound Closure Step: {wound_closure_step}', color='red')
+
+        # Ensure the output directory exists
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        # Save the plot to a file in the new directory
+        plot_filename = os.path.join(output_dir, os.path.basename('division_migration_step').replace('.xlsx', '.png'))
+        plt.savefig(plot_filename)
+
+        # Show the plot
+        plt.close()
+
+
+        # Plot Average Permeability separately
+        plt.figure(figsize=(12, 6))
+
+        # Plot Average Permeability
+        plt.plot(step, avg_permeability, label='Average Permeability', color='orange', linestyle='-', marker='s')
+
+        # Add titles and labels
+        plt.title(f'Average Permeability vs Step (Senescence Probability: {senescence_probability:.1e})')
+        plt.xlabel('Step')
+        plt.ylabel('Average Permeability')
+        plt.legend()
+
+        # Add text annotation for wound closure step (optional, since it may not make sense here)
+        if wound_closure_step != 'Not closed yet':
+            plt.axvline(x=wound_closure_step, color='red', linestyle='--', label=f'Wound Closure Step: {wound_closure_step}')
+            plt.text(wound_closure_step + 1, avg_permeability.max() * 0.9,
+                    f'Wound Closure Step: {wound_closure_step}', color='red')
+
+        # Save the Average Permeability plot
+        plot_filename = os.path.join(output_dir, os.path.basename('permeability_step').replace('.xlsx', '_avg_permeability.png'))
+        plt.savefig(plot_filename)
+        plt.close()
 
 # # Function to plot Division Count, Migration Count, Permeability, and Wound Area for different senescence probabilities in one graph
 # def plot_combined_results_multiple_probabilities(input_dir, output_dir='plot_results_combined'):
@@ -370,50 +437,42 @@ def plot_results(input_dir, output_dir='wound_closure_plot_results'):
 #     # Close the plot
 #     plt.close()
 
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-
 # Modified function to create plots for each run
 def plot_combined_results(input_dir, output_dir='plot_results_each_run'):
+    import matplotlib.pyplot as plt
     # Dictionary to store data for each run
     run_data = {}
 
     # Iterate through all Excel files in the input directory and extract data
-    for file in os.listdir(input_dir):
-        if file.endswith('.xlsx') and 'division_migration_senescence' in file:
-            # Load the results from the Excel file
-            filepath = os.path.join(input_dir, file)
-            # df = pd.read_excel(filepath)
-            df = pd.read_excel(filepath, engine='openpyxl')
-            
-            # Verify the dataframe is not empty and contains necessary columns
-            if df.empty or 'Senescence Probability' not in df.columns:
-                print(f"Skipping file {file} due to missing data or incorrect format.")
-                continue
-
-            # Extract run number from the filename
-            run_number = file.split('_run_')[-1].replace('.xlsx', '')
-            if run_number not in run_data:
-                run_data[run_number] = {
-                    'sen_probabilities': [],
-                    'step_list': [],
-                    'division_counts_list': [],
-                    'migration_counts_list': [],
-                    'avg_permeability_list': [],
-                    'wound_area_list': []
-                }
-
-            senescence_probability = df['Senescence Probability'].iloc[0]
-            print(f"Processing file: {file} with senescence probability: {senescence_probability} for run: {run_number}")
-
-            # Store data for plotting
-            run_data[run_number]['sen_probabilities'].append(senescence_probability)
-            run_data[run_number]['step_list'].append(df['Step'])
-            run_data[run_number]['division_counts_list'].append(df['Division Count'])
-            run_data[run_number]['migration_counts_list'].append(df['Migration Count'])
-            run_data[run_number]['avg_permeability_list'].append(df['Average Permeability'])
-            run_data[run_number]['wound_area_list'].append(df['Wound Area'])
+    for file, df in load_result_files(input_dir).items():
+        
+        # Verify the dataframe is not empty and contains necessary columns
+        if df.empty or 'Senescence Probability' not in df.columns:
+            print(f"Skipping file {file} due to missing data or incorrect format.")
+            continue
+
+        # Extract run number from the filename
+        _, run_number = parse_result_filename(file)
+        if run_number not in run_data:
+            run_data[run_number] = {
+                'sen_probabilities': [],
+                'step_list': [],
+                'division_counts_list': [],
+                'migration_counts_list': [],
+                'avg_permeability_list': [],
+                'wound_area_list': []
+            }
+
+        senescence_probability = df['Senescence Probability'].iloc[0]
+        print(f"Processing file: {file} with senescence probability: {senescence_probability} for run: {run_number}")
+
+        # Store data for plotting
+        run_data[run_number]['sen_probabilities'].append(senescence_probability)
+        run_data[run_number]['step_list'].append(df['Step'])
+        run_data[run_number]['division_counts_list'].append(df['Division Count'])
+        run_data[run_number]['migration_counts_list'].append(df['Migration Count'])
+        run_data[run_number]['avg_permeability_list'].append(df['Average Permeability'])
+        run_data[run_number]['wound_area_list'].append(df['Wound Area'])
 
     # Create plots for each run
     for run_number, data in run_data.items():
@@ -489,6 +548,7 @@ def plot_combined_results(input_dir, output_dir='plot_results_each_run'):
 
 # Function to calculate and plot the average wound closure step with standard deviation, ensuring x-axis labels are readable
 def plot_avg_wound_closure_with_std(input_dir, output_dir='plot_results_each_run'):
+    import matplotlib.pyplot as plt
     # Ensure the output directory exists
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -497,30 +557,20 @@ def plot_avg_wound_closure_with_std(input_dir, output_dir='plot_results_each_run
     senescence_data = {}
 
     # Iterate through all Excel files in the input directory and extract data
-    for file in os.listdir(input_dir):
-        if file.endswith('.xlsx') and 'division_migration_senescence' in file:
-            # Extract senescence probability from the filename dynamically
-            parts = file.split('_')
-            try:
-                senescence_prob = parts[3]  # Extract probability from the 4th part of the filename
-            except IndexError:
-                print(f"Skipping file {file} due to unexpected filename format.")
-                continue
-
-            # Load the results from the Excel file
-            filepath = os.path.join(input_dir, file)
-            df = pd.read_excel(filepath, engine='openpyxl')
-
-            # Verify the dataframe is not empty and contains necessary columns
-            if df.empty or 'Wound Closure Step' not in df.columns:
-                print(f"Skipping file {file} due to missing data or incorrect format.")
-                continue
-
-            # Store the wound closure step data
-            wound_closure_steps = df['Wound Closure Step'].tolist()
-            if senescence_prob not in senescence_data:
-                senescence_data[senescence_prob] = []
-            senescence_data[senescence_prob].extend(wound_closure_steps)
+    for file, df in load_result_files(input_dir).items():
+        # Extract senescence probability from the filename (e.g. '1.0e-01')
+        senescence_prob, _ = parse_result_filename(file)
+
+        # Verify the dataframe is not empty and contains necessary columns
+        if df.empty or 'Wound Closure Step' not in df.columns:
+            print(f"Skipping file {file} due to missing data or incorrect format.")
+            continue
+
+        # Store the wound closure step data
+        wound_closure_steps = df['Wound Closure Step'].tolist()
+        if senescence_prob not in senescence_data:
+            senescence_data[senescence_prob] = []
+        senescence_data[senescence_prob].extend(wound_closure_steps)
 
     # Compute mean and standard deviation for each detected senescence probability
     avg_wound_closure_per_senescence = {k: np.mean(v) if v else 0 for k, v in senescence_data.items()}
@@ -661,46 +711,36 @@ def calculate_corrected_avg_migration_count_per_senescence(input_dir):
     fluctuation_std_per_senescence = {}
 
     # Iterate through all Excel files in the input directory
-    for file in os.listdir(input_dir):
-        if file.endswith('.xlsx') and 'division_migration_senescence' in file:
-            # Extract senescence probability from the filename dynamically
-            parts = file.split('_')
-            try:
-                senescence_prob = parts[3]  # Extract probability from the 4th part of the filename
-            except IndexError:
-                print(f"Skipping file {file} due to unexpected filename format.")
-                continue
-
-            # Load the results from the Excel file
-            filepath = os.path.join(input_dir, file)
-            df = pd.read_excel(filepath, engine='openpyxl')
-
-            # Verify the dataframe is not empty and contains necessary columns
-            if df.empty or 'Wound Closure Step' not in df.columns or 'Migration Count' not in df.columns:
-                print(f"Skipping file {file} due to missing data or incorrect format.")
-                continue
-
-            # Extract wound closure step
-            wound_closure_step = df["Wound Closure Step"].iloc[0]  # Assuming constant within a file
-
-            # Compute the mean migration count before wound closure for this run
-            df_filtered = df[df["Step"] <= wound_closure_step]
-            mean_migration_before_closure = df_filtered["Migration Count"].mean()
-
-            # Store the data
-            if senescence_prob not in senescence_migration_data:
-                senescence_migration_data[senescence_prob] = []
-
-            senescence_migration_data[senescence_prob].append(mean_migration_before_closure)
-
-            # Compute the standard deviation of fluctuations after a big drop (5 steps after wound closure)
-            df_post_closure = df[(df["Step"] > wound_closure_step) & (df["Step"] <= wound_closure_step + 5)]
-            fluctuation_std = df_post_closure["Migration Count"].std()
-
-            if senescence_prob not in fluctuation_std_per_senescence:
-                fluctuation_std_per_senescence[senescence_prob] = []
-            
-            fluctuation_std_per_senescence[senescence_prob].append(fluctuation_std)
+    for file, df in load_result_files(input_dir).items():
+        # Extract senescence probability from the filename (e.g. '1.0e-01')
+        senescence_prob, _ = parse_result_filename(file)
+
+        # Verify the dataframe is not empty and contains necessary columns
+        if df.empty or 'Wound Closure Step' not in df.columns or 'Migration Count' not in df.columns:
+            print(f"Skipping file {file} due to missing data or incorrect format.")
+            continue
+
+        # Extract wound closure step
+        wound_closure_step = df["Wound Closure Step"].iloc[0]  # Assuming constant within a file
+
+        # Compute the mean migration count before wound closure for this run
+        df_filtered = df[df["Step"] <= wound_closure_step]
+        mean_migration_before_closure = df_filtered["Migration Count"].mean()
+
+        # Store the data
+        if senescence_prob not in senescence_migration_data:
+            senescence_migration_data[senescence_prob] = []
+
+        senescence_migration_data[senescence_prob].append(mean_migration_before_closure)
+
+        # Compute the standard deviation of fluctuations after a big drop (5 steps after wound closure)
+        df_post_closure = df[(df["Step"] > wound_closure_step) & (df["Step"] <= wound_closure_step + 5)]
+        fluctuation_std = df_post_closure["Migration Count"].std()
+
+        if senescence_prob not in fluctuation_std_per_senescence:
+            fluctuation_std_per_senescence[senescence_prob] = []
+        
+        fluctuation_std_per_senescence[senescence_prob].append(fluctuation_std)
 
     # Compute the average of mean migration counts for each senescence probability
     corrected_avg_migration_per_senescence = {
@@ -714,17 +754,20 @@ def calculate_corrected_avg_migration_count_per_senescence(input_dir):
 
     return corrected_avg_migration_per_senescence, avg_fluctuation_std_per_senescence
 
-# Example usage
-input_directory = "/Users/jihopark/Desktop/Jiho_IS/Lung_Epithelial_Simulation/Simple Model_hour base"
-corrected_avg_migration_counts, avg_fluctuation_stds = calculate_corrected_avg_migration_count_per_senescence(input_directory)
-print("Corrected Average Migration Counts:", corrected_avg_migration_counts)
-print("Average Fluctuation Standard Deviations:", avg_fluctuation_stds)
+if __name__ == "__main__":
+    import pandas as pd
+
+    # Example usage
+    input_directory = "/Users/jihopark/Desktop/Jiho_IS/Lung_Epithelial_Simulation/Simple Model_hour base"
+    corrected_avg_migration_counts, avg_fluctuation_stds = calculate_corrected_avg_migration_count_per_senescence(input_directory)
+    print("Corrected Average Migration Counts:", corrected_avg_migration_counts)
+    print("Average Fluctuation Standard Deviations:", avg_fluctuation_stds)
 
-# Display the results
-df_results_corrected = pd.DataFrame(
-    list(corrected_avg_migration_counts.items()), columns=["Senescence Probability", "Corrected Avg Migration Count"]
-)
+    # Display the results
+    df_results_corrected = pd.DataFrame(
+        list(corrected_avg_migration_counts.items()), columns=["Senescence Probability", "Corrected Avg Migration Count"]
+    )
 
-df_fluctuation_stds = pd.DataFrame(
-    list(avg_fluctuation_stds.items()), columns=["Senescence Probability", "Fluctuation Std Dev"]
-)
\ No newline at end of file
+    df_fluctuation_stds = pd.DataFrame(
+        list(avg_fluctuation_stds.items()), columns=["Senescence Probability", "Fluctuation Std Dev"]
+    )